@@ -9,6 +9,9 @@ from src.ingestion.data_fetcher import (
     fetch_product_details,
     fetch_product_comments
 )
+from src.ingestion.distributed_crawl import run_distributed_crawl
+from src.database import load_cleaned_data_to_database
+from src.sketches import is_summary_path, update_review_summaries
 from src.utils import clean_product_data, clean_comments_data, merge_product_and_comment_data
 from src.visualization.line_bar_plot import (
     create_line_bar_plot,
@@ -16,6 +19,7 @@ from src.visualization.line_bar_plot import (
 )
 from src.visualization.box_plot import create_box_plot
 from src.visualization.scatter_plot import create_scatter_plot
+from src.monitoring import start_run, get_run
 
 # === CONSTANTS: FILE PATHS ===
 # Define all input/output file paths here for centralized management.
@@ -24,14 +28,28 @@ from src.visualization.scatter_plot import create_scatter_plot
 PRODUCT_IDS_PATH = 'data/product_id_sach.csv'
 RAW_PRODUCT_PATH = 'data/crawled_data_sach.csv'
 RAW_COMMENTS_PATH = 'data/comments_data_sach.csv'
+CRAWL_QUEUE_PATH = 'data/crawl_queue.sqlite'
+REVIEW_INDEX_PATH = 'data/review_index.sqlite'
+COMMENT_REQUEST_BUDGET = None  # Max comment requests per crawl (None = no limit)
+CRAWL_WORKERS = 4
 
 # --- CLEANING PATHS ---
 CLEANED_PRODUCT_PATH = 'data/cleaned_product_sach.csv'
 CLEANED_COMMENTS_PATH = 'data/cleaned_comments_sach.csv'
 MERGED_DATA_PATH = 'data/merged_tiki_data.csv'
+DATABASE_PATH = 'data/tiki_reviews.sqlite'
+SUMMARY_PATH = 'data/review_summaries.json'
+SUMMARY_BATCH_DIR = 'data/summaries/'  # One summary file per cleaning batch, merged into SUMMARY_PATH
+SUMMARY_INDEX_PATH = 'data/summary_index.sqlite'  # Comment IDs already counted in SUMMARY_PATH
+PLOT_MEMORY_BUDGET_MB = 64  # Memory budget (MB) per chunk when plots read the merged CSV
 
 # --- REPORT PATHS ---
 REPORT_PATH = 'reports/'
+RUN_REPORT_PATH = 'reports/run_reports/'
+
+# --- PROFILING ---
+# Set TIKI_PROFILE_STAGES=1 to dump a cProfile file per stage next to the run reports.
+PROFILE_DIR = 'reports/run_reports/profiles/' if os.environ.get('TIKI_PROFILE_STAGES')=='1' else None
 
 
 # === ENVIRONMENT SETUP FUNCTION ===
@@ -49,6 +67,7 @@ def setup_environment():
 def run_data_ingestion():
     """Executes the data fetching pipeline: IDs, Product Details, and Comments."""
     print("\n--- Starting Data Ingestion workflow from Tiki ---")
+    start_run('ingestion', profile_dir=PROFILE_DIR)
 
     # 3.1. Fetch Product IDs
     df_ids = fetch_product_ids(
@@ -59,22 +78,67 @@ def run_data_ingestion():
 
     if df_ids.empty:
         print("\nProcess halted because no product IDs were collected.")
+        get_run().save(RUN_REPORT_PATH)
         return
 
     # 3.2. Fetch Product Details
     fetch_product_details(
         input_path=PRODUCT_IDS_PATH,
-        output_path=RAW_PRODUCT_PATH
+        output_path=RAW_PRODUCT_PATH,
+        database_path=DATABASE_PATH
     )
 
     # 3.3. Fetch Product Comments
     fetch_product_comments(
         input_path=PRODUCT_IDS_PATH,
         max_comment_pages=5,
-        output_path=RAW_COMMENTS_PATH
+        output_path=RAW_COMMENTS_PATH,
+        dedup_index_path=REVIEW_INDEX_PATH,
+        product_details_path=RAW_PRODUCT_PATH,
+        request_budget=COMMENT_REQUEST_BUDGET,
+        database_path=DATABASE_PATH
     )
 
     print("\n--- Data Ingestion workflow completed! ---")
+    get_run().save(RUN_REPORT_PATH)
+
+
+# === DISTRIBUTED DATA INGESTION FUNCTION ===
+def run_distributed_ingestion():
+    """
+    Fetches product IDs, then crawls details and comments with parallel worker processes
+    sharing a durable work queue. Re-running resumes an interrupted crawl.
+    """
+    print("\n--- Starting Distributed Data Ingestion workflow from Tiki ---")
+    start_run('distributed_ingestion', profile_dir=PROFILE_DIR)
+
+    if not os.path.exists(PRODUCT_IDS_PATH):
+        df_ids = fetch_product_ids(
+            category_id='8322',
+            max_pages=20,
+            output_path=PRODUCT_IDS_PATH
+        )
+
+        if df_ids.empty:
+            print("\nProcess halted because no product IDs were collected.")
+            get_run().save(RUN_REPORT_PATH)
+            return
+
+    run_distributed_crawl(
+        input_path=PRODUCT_IDS_PATH,
+        db_path=CRAWL_QUEUE_PATH,
+        num_workers=CRAWL_WORKERS,
+        max_comment_pages=5,
+        product_output_path=RAW_PRODUCT_PATH,
+        comment_output_path=RAW_COMMENTS_PATH,
+        dedup_index_path=REVIEW_INDEX_PATH,
+        database_path=DATABASE_PATH,
+        report_dir=RUN_REPORT_PATH,
+        request_budget=COMMENT_REQUEST_BUDGET
+    )
+
+    print("\n--- Distributed Data Ingestion workflow completed! ---")
+    get_run().save(RUN_REPORT_PATH)
 
 
 # === DATA CLEANING AND MERGING FUNCTION ===
@@ -82,6 +146,7 @@ def run_data_cleaning():
     """
     Cleans the raw product and comment data, then merges the two cleaned datasets.
     """
+    start_run('cleaning', profile_dir=PROFILE_DIR)
     df_product = pd.DataFrame()
     df_comment = pd.DataFrame()
 
@@ -120,11 +185,20 @@ def run_data_cleaning():
         if not df_merged.empty:
             df_merged.to_csv(MERGED_DATA_PATH, index=False)
             print(f"✅ MERGE SUCCESSFUL. Saved {len(df_merged)} rows to: {MERGED_DATA_PATH}")
+
+            # Summarize only this batch's new reviews and merge them into the running summaries
+            update_review_summaries(MERGED_DATA_PATH, SUMMARY_PATH, SUMMARY_INDEX_PATH, SUMMARY_BATCH_DIR)
         else:
             print("⚠️ Merge resulted in an empty DataFrame. Check the data structure and keys.")
     else:
         print("\n⚠️ Cannot perform merge: One or both cleaned files are empty/missing.")
 
+    # --- Upsert into Embedded Database ---
+    if not df_product.empty or not df_comment.empty:
+        load_cleaned_data_to_database(df_product, df_comment, DATABASE_PATH)
+
+    get_run().save(RUN_REPORT_PATH)
+
 
 # === DATA VISUALIZATION FUNCTION ===
 def run_visualization_plots():
@@ -137,14 +211,24 @@ def run_visualization_plots():
         print(f"\n⚠️ Error: Missing required cleaned or merged data files. Please run Data Cleaning (Option 2) first.")
         return
 
+    start_run('visualization', profile_dir=PROFILE_DIR)
+
+    # Prefer the embedded database: plot data preparation then runs as indexed queries.
+    # The merged summaries are offered too; they render without reading any review rows.
+    plot_sources = [path for path in (DATABASE_PATH, MERGED_DATA_PATH, SUMMARY_PATH) if os.path.exists(path)]
+    row_source = plot_sources[0]
+    plot_source = plot_sources[0]
+
     while True:
         print("\n----------------------------------------------")
         print(" SELECT VISUALIZATION PLOT ")
+        print(f" Data source: {plot_source}")
         print("----------------------------------------------")
         print("3.1. Line-Bar: Rating Trend (Avg Rating by Month)")
         print("3.2. Box-plot: Rating Distribution by Brand (Top 10)")
         print("3.3. Scatter-plot: Review Length vs. Rating (P3)")
         print("3.4. 🔙 Back to Main Menu")
+        print("3.5. 🔄 Switch data source (database / merged CSV / summaries)")
         print("----------------------------------------------")
 
         vis_choice = input("Please select plot type (e.g., 3.1): ").strip()
@@ -152,29 +236,42 @@ def run_visualization_plots():
         if vis_choice=='3.1':
             print("Creating Line-Bar Rating Trend Plot...")
             create_line_bar_time_series_plot(
-                input_path=MERGED_DATA_PATH,
-                output_path=os.path.join(REPORT_PATH, 'linebar_rating_time_series.png')
+                input_path=plot_source,
+                output_path=os.path.join(REPORT_PATH, 'linebar_rating_time_series.png'),
+                memory_budget_mb=PLOT_MEMORY_BUDGET_MB
             )
             print("Line-Bar Rating Trend Plot completed.")
 
         elif vis_choice=='3.2':
             print("Creating Box Plot (Rating Distribution by Brand)...")
             create_box_plot(
-                input_path=MERGED_DATA_PATH,
-                output_path=os.path.join(REPORT_PATH, 'boxplot_rating_by_brand.png')
+                input_path=plot_source,
+                output_path=os.path.join(REPORT_PATH, 'boxplot_rating_by_brand.png'),
+                memory_budget_mb=PLOT_MEMORY_BUDGET_MB
             )
             print("Box Plot completed.")
 
         elif vis_choice=='3.3':
             print("Creating Scatter Plot (Review Length vs. Rating)...")
+            # Summaries do not keep individual review lengths: use the row-level source
+            if is_summary_path(plot_source):
+                print(f"Summaries cannot draw this plot; using {row_source} instead.")
             create_scatter_plot(
-                input_path=MERGED_DATA_PATH,
-                output_path=os.path.join(REPORT_PATH, 'scatterplot_review_length_vs_rating.png')
+                input_path=row_source if is_summary_path(plot_source) else plot_source,
+                output_path=os.path.join(REPORT_PATH, 'scatterplot_review_length_vs_rating.png'),
+                memory_budget_mb=PLOT_MEMORY_BUDGET_MB
             )
             print("Scatter Plot completed.")
 
         elif vis_choice=='3.4':
+            if get_run().stages:
+                get_run().save(RUN_REPORT_PATH)
             break
+
+        elif vis_choice=='3.5':
+            plot_source = plot_sources[(plot_sources.index(plot_source) + 1) % len(plot_sources)]
+            print(f"Data source switched to: {plot_source}")
+
         else:
             print("Invalid choice. Please re-enter (e.g., 3.1 or 3.4).")
 
@@ -191,6 +288,7 @@ def main_menu():
         print("1. Data Ingestion (Crawl data from Tiki API)")
         print("2. Data Cleaning (Clean crawled data)")
         print("3. Data Visualization (Visualize cleaned data)")
+        print("4. Distributed Data Ingestion (Parallel workers, resumable)")
         print("0. Exit")
         print("==============================================")
 
@@ -202,11 +300,13 @@ def main_menu():
             run_data_cleaning()
         elif choice=='3':
             run_visualization_plots()
+        elif choice=='4':
+            run_distributed_ingestion()
         elif choice=='0':
             print("Goodbye! See you again.")
             sys.exit(0)
         else:
-            print("Invalid choice. Please re-enter a number from 1 to 3.")
+            print("Invalid choice. Please re-enter a number from 0 to 4.")
 
 
 # === PROGRAM ENTRY POINT ===
@@ -0,0 +1,208 @@
+# Data-science-project\src\database.py
+
+# === IMPORTS ===
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+import pandas as pd
+from src.monitoring import track_stage
+
+# === CONSTANTS: DATABASE FILE EXTENSIONS ===
+DATABASE_EXTENSIONS = ('.sqlite', '.sqlite3', '.db')
+
+# === CONSTANTS: TABLE SCHEMA ===
+PRODUCT_COLUMNS = {
+    'id': 'TEXT PRIMARY KEY',
+    'sku': 'TEXT',
+    'short_description': 'TEXT',
+    'price': 'REAL',
+    'list_price': 'REAL',
+    'discount': 'REAL',
+    'discount_rate': 'REAL',
+    'review_count': 'INTEGER',
+    'product_name': 'TEXT',
+    'brand_id': 'TEXT',
+    'brand_name': 'TEXT',
+}
+
+REVIEW_COLUMNS = {
+    'comment_id': 'INTEGER PRIMARY KEY',
+    'product_id': 'TEXT NOT NULL',
+    'title': 'TEXT',
+    'content': 'TEXT',
+    'thank_count': 'INTEGER',
+    'customer_id': 'INTEGER',
+    'customer_name': 'TEXT',
+    'rating': 'INTEGER',
+    'created_at': 'INTEGER',  # Unix epoch seconds
+    'purchased_at': 'INTEGER',  # Unix epoch seconds
+}
+
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_products_brand ON products (brand_name)',
+    'CREATE INDEX IF NOT EXISTS idx_reviews_product ON reviews (product_id)',
+    'CREATE INDEX IF NOT EXISTS idx_reviews_created ON reviews (created_at)',
+)
+
+# Reviews joined to their product; mirrors merge_product_and_comment_data (comments of unknown products are dropped)
+_MERGED_REVIEWS = 'reviews r JOIN products p ON p.id = r.product_id'
+
+
+# === CONNECTION HELPERS ===
+def is_database_path(path):
+    """True if the path points to an embedded database file rather than a CSV."""
+    return str(path).lower().endswith(DATABASE_EXTENSIONS)
+
+
+def connect(db_path):
+    """Opens the database, creating the product/review tables and indexes if needed."""
+    conn = sqlite3.connect(db_path)
+    for table, columns in (('products', PRODUCT_COLUMNS), ('reviews', REVIEW_COLUMNS)):
+        column_sql = ', '.join(f'{name} {sql_type}' for name, sql_type in columns.items())
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({column_sql})')
+    for index_sql in _INDEXES:
+        conn.execute(index_sql)
+    return conn
+
+
+def _to_epoch_seconds(series: pd.Series):
+    """Converts a datetime (or already numeric epoch) column to nullable integer epoch seconds."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = (series - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return pd.to_numeric(series, errors='coerce').astype('Int64')
+
+
+def _upsert(conn, table, schema, key, df: pd.DataFrame, keep_existing=False):
+    """
+    Inserts the DataFrame rows into the table, updating rows whose key already exists.
+    With keep_existing, a missing (NULL) incoming value leaves the stored value unchanged.
+    """
+    columns = [col for col in schema if col in df.columns]
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+
+    placeholders = ', '.join('?' for _ in columns)
+    update_sql = '{0} = COALESCE(excluded.{0}, {0})' if keep_existing else '{0} = excluded.{0}'
+    updates = ', '.join(update_sql.format(col) for col in columns if col!=key)
+    on_conflict = f'DO UPDATE SET {updates}' if updates else 'DO NOTHING'
+    conn.executemany(
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+        f'ON CONFLICT({key}) {on_conflict}',
+        values.itertuples(index=False, name=None))
+    return len(values)
+
+
+# === UPSERT FUNCTIONS ===
+def upsert_products(db_path, df_product: pd.DataFrame, raw=False):
+    """
+    Upserts product rows keyed on product id. Returns the number of rows written.
+    With raw=True (rows straight from ingestion), missing values never overwrite the
+    values that cleaning stored earlier.
+    """
+    df = df_product.dropna(subset=['id']).copy()
+    df['id'] = df['id'].astype(str)
+
+    with closing(connect(db_path)) as conn, conn:
+        return _upsert(conn, 'products', PRODUCT_COLUMNS, 'id', df, keep_existing=raw)
+
+
+def upsert_reviews(db_path, df_comment: pd.DataFrame, raw=False):
+    """
+    Upserts review rows keyed on review id. Returns the number of rows written.
+    With raw=True (rows straight from ingestion), missing values never overwrite the
+    values that cleaning stored earlier.
+    """
+    df = df_comment.rename(columns={'id': 'comment_id'}).dropna(subset=['comment_id', 'product_id']).copy()
+    df['comment_id'] = pd.to_numeric(df['comment_id'], errors='coerce').astype('Int64')
+    df['product_id'] = df['product_id'].astype(str)
+
+    for col in ('created_at', 'purchased_at'):
+        if col in df.columns:
+            df[col] = _to_epoch_seconds(df[col])
+
+    with closing(connect(db_path)) as conn, conn:
+        return _upsert(conn, 'reviews', REVIEW_COLUMNS, 'comment_id', df, keep_existing=raw)
+
+
+@track_stage('load_database')
+def load_cleaned_data_to_database(df_product: pd.DataFrame, df_comment: pd.DataFrame, db_path):
+    """Upserts the cleaned products and reviews into the embedded database."""
+    print(f"\n[Database] Upserting cleaned data into: {db_path}")
+    n_products = upsert_products(db_path, df_product) if not df_product.empty else 0
+    n_reviews = upsert_reviews(db_path, df_comment) if not df_comment.empty else 0
+    print(f"[Database] Upserted {n_products} products and {n_reviews} reviews.")
+    return n_reviews
+
+
+# === QUERY FUNCTIONS (PUSHED-DOWN PLOT DATA PREPARATION) ===
+def _query(db_path, sql, params=()):
+    """Runs a read query and returns the result as a DataFrame."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def query_box_plot_data(db_path, top_n):
+    """Returns (brand_name, rating, comment_id) rows of the Top N brands by review count."""
+    sql = f"""
+        WITH rated AS (
+            SELECT TRIM(p.brand_name) AS brand_name, r.rating, r.comment_id
+            FROM {_MERGED_REVIEWS}
+            WHERE p.brand_name IS NOT NULL AND r.rating IS NOT NULL
+        ),
+        top_brands AS (
+            SELECT brand_name FROM rated GROUP BY brand_name ORDER BY COUNT(*) DESC LIMIT ?
+        )
+        SELECT brand_name, rating, comment_id FROM rated
+        WHERE brand_name IN (SELECT brand_name FROM top_brands)
+    """
+    return _query(db_path, sql, (top_n,))
+
+
+def query_monthly_rating_stats(db_path):
+    """Returns average rating and review count per month ('YYYY-MM'), in chronological order."""
+    sql = f"""
+        SELECT strftime('%Y-%m', r.created_at, 'unixepoch') AS Month_Year,
+               AVG(r.rating) AS avg_rating,
+               COUNT(*) AS review_count
+        FROM {_MERGED_REVIEWS}
+        WHERE r.created_at IS NOT NULL AND r.rating IS NOT NULL
+        GROUP BY Month_Year
+        ORDER BY Month_Year
+    """
+    return _query(db_path, sql)
+
+
+def query_review_length_vs_rating(db_path):
+    """Returns (review_length, rating) for non-empty reviews rated 1-5."""
+    sql = f"""
+        SELECT LENGTH(r.content) AS review_length, r.rating
+        FROM {_MERGED_REVIEWS}
+        WHERE LENGTH(r.content) > 0 AND r.rating BETWEEN 1 AND 5
+    """
+    return _query(db_path, sql)
+
+
+def query_reviews(db_path, brand_name=None, month=None, columns=('comment_id', 'product_id', 'rating', 'content', 'created_at')):
+    """
+    Ad-hoc query for reviews, optionally filtered by brand and by month ('YYYY-MM').
+    The month filter is translated into an epoch range so the created_at index is used.
+    """
+    conditions, params = [], []
+
+    if brand_name is not None:
+        conditions.append('p.brand_name = ?')
+        params.append(brand_name)
+
+    if month is not None:
+        start = datetime.strptime(month, '%Y-%m').replace(tzinfo=timezone.utc)
+        end = start.replace(year=start.year + 1, month=1) if start.month==12 else start.replace(month=start.month + 1)
+        conditions.append('r.created_at >= ? AND r.created_at < ?')
+        params.extend([int(start.timestamp()), int(end.timestamp())])
+
+    select_sql = ', '.join(f'r.{col}' if col in REVIEW_COLUMNS else f'p.{col}' for col in columns)
+    where_sql = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+    return _query(db_path, f'SELECT {select_sql} FROM {_MERGED_REVIEWS} {where_sql}', params)
+
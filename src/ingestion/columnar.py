@@ -0,0 +1,76 @@
+# Data-science-project\src\ingestion\columnar.py
+
+# === IMPORTS ===
+import pandas as pd
+
+# === OPTIONAL FAST JSON DECODER ===
+# orjson decodes API responses several times faster than the standard library;
+# the pipeline falls back to json when it is not installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+
+# === FIELD SPECIFICATION ===
+# A record schema is a tuple of fields: (column, key, sub_key, default).
+#   - sub_key None: column = record.get(key)
+#   - otherwise:    column = record[key].get(sub_key) if record.get(key) else default
+
+
+# === SINGLE RECORD PARSER FUNCTION ===
+def parse_record(record, fields):
+    """Extracts one API record into a dictionary following the field specification."""
+    d = dict()
+    for column, key, sub_key, default in fields:
+        if sub_key is None:
+            d[column] = record.get(key)
+        else:
+            parent = record.get(key)
+            d[column] = parent.get(sub_key) if parent else default
+    return d
+
+
+# === COLUMNAR RECORD BUILDER ===
+class ColumnarBuilder:
+    """
+    Accumulates API records directly into one list per column instead of one dict per
+    record, then builds the DataFrame from the columns in a single step. The result is
+    identical to pd.DataFrame([parse_record(r, fields) for r in records]).
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = {column: [] for column, _, _, _ in fields}
+        self._size = 0
+
+        # Bind every column's append once so the per-record loop does no lookups
+        self._flat = [(self.columns[column].append, key) for column, key, sub_key, _ in fields if sub_key is None]
+        self._nested = [(self.columns[column].append, key, sub_key, default)
+                        for column, key, sub_key, default in fields if sub_key is not None]
+
+    def __len__(self):
+        return self._size
+
+    def append(self, record):
+        """Appends one decoded API record."""
+        get = record.get
+        for append, key in self._flat:
+            append(get(key))
+        for append, key, sub_key, default in self._nested:
+            parent = get(key)
+            append(parent.get(sub_key) if parent else default)
+        self._size += 1
+
+    def extend(self, records, **constants):
+        """Appends several records; keyword arguments override a column with a constant value."""
+        for record in records:
+            if constants:
+                record.update(constants)
+            self.append(record)
+
+    def to_dataframe(self):
+        """Builds the DataFrame (an empty frame without columns if no record was added)."""
+        if not self._size:
+            return pd.DataFrame()
+        return pd.DataFrame(self.columns)
@@ -1,12 +1,17 @@
 # Data-science-project\src\ingestion\data_fetcher.py
 
 # === IMPORTS ===
-import requests
 import time
 import random
 import pandas as pd
 from tqdm import tqdm
 import os
+from src.database import upsert_products, upsert_reviews
+from src.ingestion.dedup import open_review_index
+from src.ingestion.columnar import ColumnarBuilder, json_loads, parse_record
+from src.ingestion.resilience import ResilientClient
+from src.ingestion.scheduler import plan_comment_crawl
+from src.monitoring import track_stage
 
 # === CONSTANTS: HTTP HEADERS AND COOKIES ===
 HEADERS = {
@@ -21,55 +26,70 @@ HEADERS = {
 
 COOKIES = {}
 
+# === CONSTANTS: REQUEST PARAMETERS ===
+PRODUCT_PARAMS = (('platform', 'web'),)
+COMMENT_PAGE_LIMIT = 10
+
+# === CONSTANTS: API ENDPOINT ===
+# Override with TIKI_API_BASE_URL to run the crawlers against a local fault-injecting stub
+# (python -m tests.fault_stub).
+API_BASE_URL = os.environ.get('TIKI_API_BASE_URL', 'https://tiki.vn/api/v2').rstrip('/')
+
+# === SHARED HTTP CLIENT (TIMEOUTS, RETRIES, CIRCUIT BREAKER) ===
+# Hedged requests are opt-in because they add load on the API: set TIKI_HEDGE_REQUESTS=1.
+CLIENT = ResilientClient(hedge=os.environ.get('TIKI_HEDGE_REQUESTS')=='1')
+
+
+# === RECORD SCHEMAS: (column, key, sub_key, default if parent missing) ===
+PRODUCT_FIELDS = (
+    ('id', 'id', None, None),
+    ('sku', 'sku', None, None),
+    ('short_description', 'short_description', None, None),
+    ('price', 'price', None, None),
+    ('list_price', 'list_price', None, None),
+    ('discount', 'discount', None, None),
+    ('discount_rate', 'discount_rate', None, None),
+    ('review_count', 'review_count', None, None),
+    ('order_count', 'order_count', None, None),
+    ('product_name', 'meta_title', None, None),
+    # Brand details
+    ('brand_id', 'brand', 'id', None),
+    ('brand_name', 'brand', 'name', None),
+    # Stock details
+    ('stock_item_qty', 'stock_item', 'qty', None),
+    ('stock_item_max_sale_qty', 'stock_item', 'max_sale_qty', None),
+)
+
+COMMENT_FIELDS = (
+    ('id', 'id', None, None),
+    ('title', 'title', None, None),
+    ('content', 'content', None, None),
+    ('thank_count', 'thank_count', None, None),
+    ('customer_id', 'customer_id', None, None),
+    ('rating', 'rating', None, None),
+    ('created_at', 'created_at', None, None),
+    # Customer and purchase details
+    ('customer_name', 'created_by', 'name', 'Anonymous'),
+    ('purchased_at', 'created_by', 'purchased_at', None),
+    ('product_id', 'product_id', None, None),
+)
+COMMENT_COLUMNS = [column for column, _, _, _ in COMMENT_FIELDS]
+
 
 # === PRODUCT JSON PARSER FUNCTION ===
 def parser_product(json):
     """Parses product details from the Tiki API JSON response into a dictionary."""
-    d = dict()
-    d['id'] = json.get('id')
-    d['sku'] = json.get('sku')
-    d['short_description'] = json.get('short_description')
-    d['price'] = json.get('price')
-    d['list_price'] = json.get('list_price')
-    d['discount'] = json.get('discount')
-    d['discount_rate'] = json.get('discount_rate')
-    d['review_count'] = json.get('review_count')
-    d['order_count'] = json.get('order_count')
-    d['product_name'] = json.get('meta_title')
-
-    # Extract brand details
-    brand = json.get('brand')
-    d['brand_id'] = brand.get('id') if brand else None
-    d['brand_name'] = brand.get('name') if brand else None
-
-    # Extract stock details
-    stock = json.get('stock_item')
-    d['stock_item_qty'] = stock.get('qty') if stock else None
-    d['stock_item_max_sale_qty'] = stock.get('max_sale_qty') if stock else None
-    return d
+    return parse_record(json, PRODUCT_FIELDS)
 
 
 # === COMMENT JSON PARSER FUNCTION ===
 def comment_parser(json):
     """Parses comment details from the Tiki API JSON response into a dictionary."""
-    d = dict()
-    d['id'] = json.get('id')
-    d['title'] = json.get('title')
-    d['content'] = json.get('content')
-    d['thank_count'] = json.get('thank_count')
-    d['customer_id'] = json.get('customer_id')
-    d['rating'] = json.get('rating')
-    d['created_at'] = json.get('created_at')
-
-    # Extract customer and purchase details
-    created_by = json.get('created_by')
-    d['customer_name'] = created_by.get('name') if created_by else 'Anonymous'
-    d['purchased_at'] = created_by.get('purchased_at') if created_by else None
-    d['product_id'] = json.get('product_id')
-    return d
+    return parse_record(json, COMMENT_FIELDS)
 
 
 # === FETCH PRODUCT IDS FUNCTION ===
+@track_stage('fetch_product_ids')
 def fetch_product_ids(category_id='8322', max_pages=20, output_path='data/product_id_sach.csv'):
     """
     Crawls product IDs from Tiki category pages and saves them to a CSV file.
@@ -89,15 +109,27 @@ def fetch_product_ids(category_id='8322', max_pages=20, output_path='data/produc
     product_id_list = []
     for i in range(1, max_pages + 1):
         params['page'] = i
-        response = requests.get('https://tiki.vn/api/v2/products', headers=HEADERS, params=params)
+        try:
+            response = CLIENT.get('products', f'{API_BASE_URL}/products', headers=HEADERS, params=params)
+        except Exception as e:
+            print(f'  -> Request page {i} failed after retries: {e}. Skipping page.')
+            continue
+
+        body = _decode_json(response) if response.status_code==200 else None
+        if isinstance(body, dict):
+            records = body.get('data') or []
+            print(f'  -> Request page {i} success ({len(records)} items)')
+
+            # Past the last category page: nothing more to crawl
+            if not records:
+                break
 
-        if response.status_code==200:
-            print(f'  -> Request page {i} success ({len(response.json().get("data"))} items)')
-            for record in response.json().get('data'):
+            for record in records:
                 product_id_list.append({'id': record.get('id')})
+        elif response.status_code==200:
+            print(f'  -> Request page {i} returned an invalid JSON body. Skipping page.')
         else:
-            print(f'  -> Request page {i} failed with status code: {response.status_code}. Stopping.')
-            break
+            print(f'  -> Request page {i} failed with status code: {response.status_code}. Skipping page.')
 
         # THROTTLING: Reduce delay from 3-10s to 0.5-1.0s
         time.sleep(random.uniform(0.5, 1.0))
@@ -108,10 +140,104 @@ def fetch_product_ids(category_id='8322', max_pages=20, output_path='data/produc
     return df
 
 
+# === JSON DECODING FUNCTION (INTERNAL) ===
+def _decode_json(response):
+    """Decodes a response body, returning None if it is not valid JSON."""
+    try:
+        return json_loads(response.content)
+    except ValueError:
+        # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+        return None
+
+
+# === FETCH PRODUCT RECORD FUNCTION (INTERNAL) ===
+def _fetch_product_record(pid):
+    """Fetches one product and returns its decoded (unparsed) JSON record, or None on failure."""
+    url = f'{API_BASE_URL}/products/{pid}'
+    try:
+        response = CLIENT.get('product_detail', url, headers=HEADERS, params=PRODUCT_PARAMS, cookies=COOKIES)
+    except Exception as e:
+        print(f'\nCrawl data for {pid} failed after retries: {e}')
+        return None
+
+    if response.status_code!=200:
+        print(f'\nCrawl data for {pid} failed with status code: {response.status_code}')
+        return None
+
+    # A 200 response can still carry a captcha/HTML page or a truncated body
+    record = _decode_json(response)
+    if not isinstance(record, dict):
+        print(f'\nCrawl data for {pid} failed: response is not a JSON object')
+        return None
+    return record
+
+
+# === FETCH COMMENT RECORDS FUNCTION (INTERNAL) ===
+def _fetch_comment_records(pid, page, limit=COMMENT_PAGE_LIMIT):
+    """Fetches one comment page and returns its decoded (unparsed) records, or None on failure."""
+    comment_params = {
+        'sort': 'score|desc,id|desc,stars|all',
+        'page': str(page),
+        'limit': str(limit),
+        'include': 'comments',
+        'product_id': pid,
+    }
+
+    try:
+        response = CLIENT.get('reviews', f'{API_BASE_URL}/reviews', headers=HEADERS, params=comment_params, cookies=COOKIES)
+    except Exception as e:
+        print(f'\nError while crawling comments for PID {pid} page {page}: {e}')
+        return None
+
+    if response.status_code!=200:
+        return None
+
+    body = _decode_json(response)
+    if not isinstance(body, dict):
+        print(f'\nError while crawling comments for PID {pid} page {page}: response is not a JSON object')
+        return None
+    return body.get('data') or []
+
+
+# === FETCH SINGLE PRODUCT FUNCTION ===
+def fetch_single_product(pid):
+    """
+    Fetches and parses the details of one product.
+
+    Returns:
+        dict or None: The parsed product record, or None if the request failed.
+    """
+    record = _fetch_product_record(pid)
+    return parser_product(record) if record is not None else None
+
+
+# === FETCH SINGLE COMMENT PAGE FUNCTION ===
+def fetch_comment_page(pid, page, limit=COMMENT_PAGE_LIMIT):
+    """
+    Fetches and parses one page of comments for a product.
+
+    Returns:
+        list or None: The parsed comment records (empty when the product has no more
+        comments), or None if the request failed.
+    """
+    records = _fetch_comment_records(pid, page, limit)
+    if records is None:
+        return None
+
+    comments = []
+    for comment in records:
+        comment['product_id'] = pid
+        comments.append(comment_parser(comment))
+    return comments
+
+
 # === FETCH PRODUCT DETAILS FUNCTION ===
-def fetch_product_details(input_path='data/product_id_sach.csv', output_path='data/crawled_data_sach.csv'):
+@track_stage('fetch_product_details')
+def fetch_product_details(input_path='data/product_id_sach.csv', output_path='data/crawled_data_sach.csv',
+                          database_path=None):
     """
     Fetches detailed information for a list of product IDs from a CSV file.
+    With database_path, the fetched products are also upserted into the embedded database.
     """
     print(f"\nStarting product details crawl from ID file: {input_path}")
 
@@ -121,32 +247,46 @@ def fetch_product_details(input_path='data/product_id_sach.csv', output_path='da
 
     df_id = pd.read_csv(input_path)
     p_ids = df_id.id.to_list()
-    result = []
-
-    product_params = (('platform', 'web'),)
+    result = ColumnarBuilder(PRODUCT_FIELDS)
 
     for pid in tqdm(p_ids, total=len(p_ids)):
         # THROTTLING: Reduce delay from 3-5s to 0.1-0.3s (HIGH RISK)
         time.sleep(random.uniform(0.1, 0.3))
 
-        url = f'https://tiki.vn/api/v2/products/{pid}'
-        response = requests.get(url, headers=HEADERS, params=product_params, cookies=COOKIES)
+        record = _fetch_product_record(pid)
+        if record is not None:
+            result.append(record)
 
-        if response.status_code==200:
-            result.append(parser_product(response.json()))
-        else:
-            print(f'\nCrawl data for {pid} failed with status code: {response.status_code}')
-
-    df_product = pd.DataFrame(result)
+    df_product = result.to_dataframe()
     df_product.to_csv(output_path, index=False)
     print(f"Completed. Saved {len(df_product)} product details to: {output_path}")
+
+    if database_path and not df_product.empty:
+        upsert_products(database_path, df_product, raw=True)
+        print(f"Upserted {len(df_product)} products into: {database_path}")
     return df_product
 
 
 # === FETCH PRODUCT COMMENTS FUNCTION ===
-def fetch_product_comments(input_path='data/product_id_sach.csv', max_comment_pages=5, output_path='data/comments_data_sach.csv'):
+@track_stage('fetch_product_comments')
+def fetch_product_comments(input_path='data/product_id_sach.csv', max_comment_pages=5, output_path='data/comments_data_sach.csv',
+                           dedup_index_path=None, check_content=False, product_details_path=None, request_budget=None,
+                           database_path=None):
     """
     Fetches product comments for a list of product IDs, up to max_comment_pages per product.
+
+    With product_details_path, the crawl is planned from the known review_count: products
+    without reviews are skipped, each product gets only the pages its reviews fill, and the
+    most-reviewed products are crawled first (within request_budget, if given).
+
+    Duplicate reviews (same ID, or same normalized content when check_content is set) are
+    rejected as they arrive. With dedup_index_path, the index persists across runs and new
+    reviews are appended to output_path; otherwise duplicates are rejected within the run.
+    Each page's new reviews are written to output_path before the index records them, so an
+    interrupted run never leaves the index knowing reviews the file does not contain.
+
+    With database_path, every fetched review (new or already known) is also upserted into
+    the embedded database, so re-crawled reviews update their stored values.
     """
     print(f"\nStarting product comments crawl from ID file: {input_path}")
 
@@ -154,46 +294,52 @@ def fetch_product_comments(input_path='data/product_id_sach.csv', max_comment_pa
         print(f"Error: ID file not found at {input_path}. Skipping.")
         return pd.DataFrame()
 
-    df_id = pd.read_csv(input_path)
-    p_ids = df_id.id.to_list()
-    result = []
+    plan = plan_comment_crawl(input_path, product_details_path, max_comment_pages, COMMENT_PAGE_LIMIT, request_budget)
+    result = ColumnarBuilder(COMMENT_FIELDS)
 
-    comment_params = {
-        'sort': 'score|desc,id|desc,stars|all',
-        'page': '1',
-        'limit': '10',
-        'include': 'comments'
-    }
+    # The persistent index describes the reviews already in output_path
+    dedup, append = open_review_index(dedup_index_path, output_path, check_content)
 
-    for pid in tqdm(p_ids, total=len(p_ids)):
-        comment_params['product_id'] = pid
+    if not append:
+        pd.DataFrame(columns=COMMENT_COLUMNS).to_csv(output_path, index=False)
 
-        for i in range(1, max_comment_pages + 1):
-            comment_params['page'] = i
+    try:
+        for pid, pages, _ in tqdm(plan, total=len(plan)):
+            for i in range(1, pages + 1):
+                # THROTTLING: Reduce delay from 0.5-1.5s to 0.05-0.15s (HIGH RISK)
+                time.sleep(random.uniform(0.05, 0.15))
 
-            # THROTTLING: Reduce delay from 0.5-1.5s to 0.05-0.15s (HIGH RISK)
-            time.sleep(random.uniform(0.05, 0.15))
+                records = _fetch_comment_records(pid, i)
 
-            try:
-                response = requests.get('https://tiki.vn/api/v2/reviews', headers=HEADERS, params=comment_params, cookies=COOKIES)
-
-                if response.status_code==200:
-                    data = response.json()
-
-                    # Stop fetching pages if no more data is returned
-                    if not data.get('data'):
-                        break
-
-                    for comment in data.get('data'):
-                        comment['product_id'] = pid
-                        result.append(comment_parser(comment))
-                else:
+                # Stop fetching pages on failure or if no more data is returned
+                if not records:
                     break
-            except Exception as e:
-                print(f'\nError while crawling comments for PID {pid} page {i}: {e}')
-                break
 
-    df_comment = pd.DataFrame(result)
-    df_comment.to_csv(output_path, index=False)
-    print(f"Completed. Saved {len(df_comment)} comments to: {output_path}")
+                page = ColumnarBuilder(COMMENT_FIELDS)
+                page.extend(records, product_id=pid)
+                df_page = page.to_dataframe()
+
+                new_records = dedup.filter_new(records, product_id=pid, commit=False)
+                if new_records:
+                    new_ids = [record['id'] for record in new_records]
+                    df_page[df_page['id'].isin(new_ids)].drop_duplicates(subset=['id']).to_csv(
+                        output_path, mode='a', header=False, index=False)
+                    result.extend(new_records)
+
+                if database_path:
+                    upsert_reviews(database_path, df_page.drop_duplicates(subset=['id'], keep='last'), raw=True)
+
+                # Only once the page is in output_path may the index remember its reviews
+                dedup.commit()
+    finally:
+        # Closing without a commit forgets the IDs of a page that was never written
+        dedup.abort()
+
+    print(f"Rejected {dedup.rejected_ids} duplicate review IDs and {dedup.rejected_content} duplicate contents.")
+
+    df_comment = result.to_dataframe()
+    if append:
+        print(f"Completed. Appended {len(df_comment)} new comments to: {output_path}")
+    else:
+        print(f"Completed. Saved {len(df_comment)} comments to: {output_path}")
     return df_comment
\ No newline at end of file
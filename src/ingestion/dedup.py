@@ -0,0 +1,229 @@
+# Data-science-project\src\ingestion\dedup.py
+
+# === IMPORTS ===
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import pandas as pd
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+# === BLOOM FILTER ===
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: no false negatives, about error_rate false positives
+    once capacity keys have been added. Memory is constant (~1.2 MB for 1M keys at 1%).
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: bytes):
+        # Double hashing: k positions derived from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: bytes):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# === CONTENT HASH FUNCTION ===
+def content_hash(product_id, customer_id, content):
+    """
+    Hashes a review's normalized content (case- and whitespace-insensitive) together with
+    its product and customer, so a re-posted review under a new ID is caught.
+    Returns None for empty content, which is never treated as a duplicate.
+    """
+    if not isinstance(content, str):
+        return None
+
+    text = _WHITESPACE.sub(' ', content).strip().lower()
+    if not text:
+        return None
+
+    # IDs may arrive as int (API) or float (CSV with missing values): normalize both
+    keys = [str(int(float(value))) if pd.notna(value) else '' for value in (product_id, customer_id)]
+    return hashlib.sha1(f'{keys[0]}|{keys[1]}|{text}'.encode('utf-8')).digest()
+
+
+# === REVIEW DEDUPLICATION INDEX ===
+class ReviewDeduplicator:
+    """
+    Rejects reviews whose ID (and optionally normalized content) was already seen, in this
+    run or - when index_path is a file - in any earlier run. Lookups go through a Bloom
+    filter first; only its positives are confirmed against the exact on-disk set, so memory
+    stays constant and most new reviews never touch the disk index.
+
+    When output_path is given, every commit also records the size that file had, so rows
+    appended to it after the last commit (a crash between writing and committing) can be
+    found again by committed_size().
+    """
+
+    def __init__(self, index_path=':memory:', check_content=False, capacity=1_000_000, error_rate=0.01,
+                 output_path=None):
+        self.index_path = index_path
+        self.output_path = output_path
+        self.check_content = check_content
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rejected_ids = 0
+        self.rejected_content = 0
+
+        self.conn = sqlite3.connect(index_path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen_ids (review_id INTEGER PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen_content (hash BLOB PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value INTEGER)')
+
+        # Rebuild the Bloom filters by streaming the persisted keys
+        self._id_filter = BloomFilter(capacity, error_rate)
+        self._content_filter = BloomFilter(capacity, error_rate) if check_content else None
+        for (review_id,) in self.conn.execute('SELECT review_id FROM seen_ids'):
+            self._id_filter.add(self._id_key(review_id))
+        if check_content:
+            for (digest,) in self.conn.execute('SELECT hash FROM seen_content'):
+                self._content_filter.add(digest)
+
+    @staticmethod
+    def _id_key(review_id):
+        return str(int(review_id)).encode()
+
+    def _seen(self, bloom, key, sql, value):
+        """Checks the Bloom filter, confirming its positives against the exact index."""
+        return key in bloom and self.conn.execute(sql, (value,)).fetchone() is not None
+
+    def is_new(self, review_id, product_id=None, customer_id=None, content=None):
+        """Returns True (and records the review) if it is not a duplicate."""
+        review_id = int(review_id)
+        id_key = self._id_key(review_id)
+        if self._seen(self._id_filter, id_key, 'SELECT 1 FROM seen_ids WHERE review_id = ?', review_id):
+            self.rejected_ids += 1
+            return False
+
+        digest = content_hash(product_id, customer_id, content) if self.check_content else None
+        if digest is not None and self._seen(self._content_filter, digest, 'SELECT 1 FROM seen_content WHERE hash = ?', digest):
+            self.rejected_content += 1
+            return False
+
+        self.conn.execute('INSERT OR IGNORE INTO seen_ids (review_id) VALUES (?)', (review_id,))
+        self._id_filter.add(id_key)
+        if digest is not None:
+            self.conn.execute('INSERT OR IGNORE INTO seen_content (hash) VALUES (?)', (digest,))
+            self._content_filter.add(digest)
+        return True
+
+    def filter_new(self, records, product_id=None, commit=True):
+        """
+        Returns the records of one batch (raw API or parsed review dicts) that are not
+        duplicates and records them in the index. Records without an ID are dropped.
+        With commit=False the batch stays pending until commit() is called, so a caller
+        can first store the accepted records and only then make the index remember them.
+        """
+        new_records = [
+            record for record in records
+            if record.get('id') is not None and self.is_new(
+                record['id'], record.get('product_id', product_id), record.get('customer_id'), record.get('content'))
+        ]
+        if commit:
+            self.commit()
+        return new_records
+
+    def commit(self):
+        """Persists the reviews recorded since the last commit (and the output file's size)."""
+        if self.output_path is not None and os.path.exists(self.output_path):
+            self.conn.execute("INSERT OR REPLACE INTO index_state (key, value) VALUES ('output_size', ?)",
+                              (os.path.getsize(self.output_path),))
+        self.conn.commit()
+
+    def committed_size(self):
+        """Returns the output file's size at the last commit, or None if none was recorded."""
+        row = self.conn.execute("SELECT value FROM index_state WHERE key = 'output_size'").fetchone()
+        return row[0] if row else None
+
+    def seed_from_csv(self, path, chunksize=50_000, offset=0):
+        """
+        Records every review stored in a CSV file, reading it in chunks. With a byte offset
+        (a row boundary, e.g. committed_size()), only the rows after it are read.
+        """
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [col for col in ('id', 'product_id', 'customer_id', 'content') if col in header]
+
+        with open(path, 'rb') as f:
+            if offset:
+                f.seek(offset)
+                reader = pd.read_csv(f, header=None, names=header, usecols=columns, chunksize=chunksize)
+            else:
+                reader = pd.read_csv(f, usecols=columns, chunksize=chunksize)
+
+            # Chunks are persisted as they go, but the output size only once the file is covered
+            for chunk in reader:
+                self.filter_new(chunk.dropna(subset=['id']).to_dict('records'), commit=False)
+                self.conn.commit()
+        self.commit()
+
+    def reset(self):
+        """Forgets every recorded review (e.g. when the output it tracked was deleted)."""
+        self.conn.execute('DELETE FROM seen_ids')
+        self.conn.execute('DELETE FROM seen_content')
+        self.conn.execute('DELETE FROM index_state')
+        self.conn.commit()
+        self._id_filter = BloomFilter(self.capacity, self.error_rate)
+        if self.check_content:
+            self._content_filter = BloomFilter(self.capacity, self.error_rate)
+
+    def close(self):
+        """Commits the pending reviews and closes the index."""
+        self.commit()
+        self.conn.close()
+
+    def abort(self):
+        """Closes the index without committing, forgetting the reviews recorded since the last commit."""
+        self.conn.rollback()
+        self.conn.close()
+
+
+# === PERSISTENT INDEX OPENING FUNCTION ===
+def open_review_index(index_path, output_path, check_content=False):
+    """
+    Opens the deduplicator that guards output_path, keeping the rule that a persistent
+    index describes exactly the reviews already in output_path: it is reset when the file
+    does not exist yet, seeded from the file when only the index is missing, and seeded
+    from the file's tail when rows were appended after the index's last commit (a crawl
+    interrupted between writing a page and committing it). If the file shrank below the
+    committed size it was replaced, and the index is rebuilt from it.
+
+    Returns:
+        tuple: (ReviewDeduplicator, append) where append tells whether output_path
+        already holds reviews that new ones must be appended to.
+    """
+    append = index_path is not None and os.path.exists(output_path)
+    index_exists = index_path is not None and os.path.exists(index_path)
+
+    if index_path is None:
+        return ReviewDeduplicator(check_content=check_content), append
+
+    dedup = ReviewDeduplicator(index_path, check_content=check_content, output_path=output_path)
+    if not append:
+        dedup.reset()
+        return dedup, append
+
+    committed = dedup.committed_size() if index_exists else None
+    size = os.path.getsize(output_path)
+    if committed is not None and committed > size:
+        dedup.reset()
+        committed = None
+    if committed is None:
+        dedup.seed_from_csv(output_path)
+    elif committed < size:
+        dedup.seed_from_csv(output_path, offset=committed)
+    return dedup, append
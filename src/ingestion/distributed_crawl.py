@@ -0,0 +1,222 @@
+# Data-science-project\src\ingestion\distributed_crawl.py
+
+# === IMPORTS ===
+import multiprocessing
+import os
+import random
+import socket
+import time
+import pandas as pd
+from src.database import upsert_products, upsert_reviews
+from src.ingestion.data_fetcher import fetch_single_product, fetch_comment_page, COMMENT_COLUMNS, COMMENT_PAGE_LIMIT
+from src.ingestion.dedup import open_review_index
+from src.ingestion.scheduler import comment_page_count
+from src.ingestion.work_queue import WorkQueue
+from src.monitoring import start_run, get_run, track_stage
+
+# === CONSTANTS: TASK KINDS ===
+TASK_PRODUCT = 'product'
+TASK_COMMENTS = 'comments'
+
+
+# Product details are leased before any comment page; comment pages by review_count
+PRODUCT_PRIORITY = 10 ** 12
+
+
+# === TASK BUILDERS ===
+def product_task(pid, max_pages):
+    """Builds the queue entry for fetching one product's details (and then its comment pages)."""
+    return f'{TASK_PRODUCT}:{pid}', TASK_PRODUCT, {'product_id': pid, 'max_pages': max_pages}, PRODUCT_PRIORITY
+
+
+def comment_page_task(pid, page, max_pages, priority=0):
+    """Builds the queue entry for fetching one page of a product's comments."""
+    return f'{TASK_COMMENTS}:{pid}:{page}', TASK_COMMENTS, {'product_id': pid, 'page': page, 'max_pages': max_pages}, priority
+
+
+# === QUEUE SEEDING FUNCTION ===
+def seed_crawl_queue(queue, input_path='data/product_id_sach.csv', max_comment_pages=5):
+    """
+    Enqueues a product-details task for every product ID in the ID file. Each product's
+    comment pages are queued as follow-ups once its details (and so its current
+    review_count) are fetched, see _execute_task. Re-seeding an interrupted crawl only adds
+    tasks not queued yet.
+    """
+    p_ids = pd.read_csv(input_path).id.dropna().astype('int64').drop_duplicates().to_list()
+
+    added = queue.enqueue([product_task(pid, max_comment_pages) for pid in p_ids])
+    print(f"Queued {added} new tasks for {len(p_ids)} product IDs.")
+    return added
+
+
+# === TASK EXECUTION FUNCTION ===
+def _execute_task(task):
+    """
+    Runs one task against the Tiki API.
+
+    Returns:
+        tuple: (records, follow_up_tasks). Raises RuntimeError if the request failed.
+    """
+    payload = task['payload']
+    pid = payload['product_id']
+
+    if task['kind']==TASK_PRODUCT:
+        product = fetch_single_product(pid)
+        if product is None:
+            raise RuntimeError(f'product request failed for {pid}')
+
+        # Plan the comment pages from the review_count just fetched: every page up front,
+        # prioritized by it; without a count, only the first page (more follow while pages are full)
+        review_count = product.get('review_count')
+        pages = comment_page_count(review_count, payload['max_pages'], COMMENT_PAGE_LIMIT)
+        if review_count is None or pd.isna(review_count):
+            follow_ups = [comment_page_task(pid, 1, pages)] if pages else []
+        else:
+            follow_ups = [comment_page_task(pid, page, pages, int(review_count)) for page in range(1, pages + 1)]
+        return [product], follow_ups
+
+    page = payload['page']
+    comments = fetch_comment_page(pid, page)
+    if comments is None:
+        raise RuntimeError(f'comment request failed for {pid} page {page}')
+
+    # A full page means there may be more comments: queue the next page
+    follow_ups = []
+    if len(comments)==COMMENT_PAGE_LIMIT and page < payload['max_pages']:
+        follow_ups.append(comment_page_task(pid, page + 1, payload['max_pages']))
+    return comments, follow_ups
+
+
+# === WORKER LOOP FUNCTION ===
+def run_worker(db_path, worker_id=None, lease_seconds=120, idle_sleep=2.0, report_dir=None, request_budget=None):
+    """
+    Leases and executes tasks from the work queue until no open tasks remain.
+    Several worker processes on the same host may share one queue file.
+    With request_budget, at most that many comment-page tasks are queued in total.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    queue = WorkQueue(db_path, lease_seconds=lease_seconds)
+    start_run(f'worker_{worker_id}')
+    done, lost, failed = 0, 0, 0
+
+    with get_run().stage('crawl_worker') as record:
+        while True:
+            task = queue.lease(worker_id)
+
+            if task is None:
+                if not queue.has_open_tasks():
+                    break
+                # Other workers still hold leases that may expire: wait and retry
+                time.sleep(idle_sleep)
+                continue
+
+            # THROTTLING: Same per-request delay as the single-process crawler
+            time.sleep(random.uniform(0.1, 0.3))
+
+            try:
+                records, follow_ups = _execute_task(task)
+            except Exception as e:
+                queue.fail(task, e)
+                failed += 1
+                continue
+
+            if queue.complete(task, records, follow_ups, follow_up_budget=request_budget):
+                done += 1
+            else:
+                lost += 1
+
+        record['rows'] = done
+
+    print(f"[Worker {worker_id}] Finished: {done} tasks done, {failed} failed attempts, {lost} leases lost.")
+    if report_dir:
+        get_run().save(report_dir)
+    return done
+
+
+# === RESULT EXPORT FUNCTION ===
+def export_crawl_results(db_path, product_output_path='data/crawled_data_sach.csv',
+                         comment_output_path='data/comments_data_sach.csv', dedup_index_path=None,
+                         database_path=None):
+    """
+    Writes the crawled products stored in the queue to the raw product CSV and adds the
+    crawled comments to the raw comments CSV. With dedup_index_path, the comments go through
+    the same persistent review index as the sequential crawler: reviews already in the file
+    are skipped, new ones are appended and only then recorded in the index. With
+    database_path, all crawled products and reviews are also upserted into the embedded database.
+    """
+    queue = WorkQueue(db_path)
+
+    df_product = pd.DataFrame(list(queue.iter_results(TASK_PRODUCT)))
+    df_product.to_csv(product_output_path, index=False)
+    print(f"Saved {len(df_product)} product details to: {product_output_path}")
+
+    # Overlapping comment pages (and earlier crawls) can return the same review more than once
+    dedup, append = open_review_index(dedup_index_path, comment_output_path)
+    try:
+        comment_records = list(queue.iter_results(TASK_COMMENTS))
+        new_records = dedup.filter_new(comment_records, commit=False)
+        df_comment = pd.DataFrame(new_records, columns=COMMENT_COLUMNS)
+        if append:
+            df_comment.to_csv(comment_output_path, mode='a', header=False, index=False)
+        else:
+            df_comment.to_csv(comment_output_path, index=False)
+        dedup.commit()
+    finally:
+        dedup.abort()
+
+    print(f"{'Appended' if append else 'Saved'} {len(df_comment)} new comments to: {comment_output_path} "
+          f"({dedup.rejected_ids} duplicates skipped)")
+
+    if database_path:
+        df_all = pd.DataFrame(comment_records, columns=COMMENT_COLUMNS).drop_duplicates(subset=['id'], keep='last')
+        n_products = upsert_products(database_path, df_product, raw=True) if not df_product.empty else 0
+        n_reviews = upsert_reviews(database_path, df_all, raw=True) if not df_all.empty else 0
+        print(f"Upserted {n_products} products and {n_reviews} reviews into: {database_path}")
+    return df_product, df_comment
+
+
+# === DISTRIBUTED CRAWL ORCHESTRATION FUNCTION ===
+@track_stage('distributed_crawl')
+def run_distributed_crawl(input_path='data/product_id_sach.csv', db_path='data/crawl_queue.sqlite',
+                          num_workers=4, max_comment_pages=5,
+                          product_output_path='data/crawled_data_sach.csv',
+                          comment_output_path='data/comments_data_sach.csv', report_dir=None,
+                          request_budget=None, dedup_index_path=None, database_path=None):
+    """
+    Crawls product details and comments with num_workers local worker processes sharing
+    a durable SQLite work queue, then exports the results to the raw CSV files (comments
+    through the persistent review index at dedup_index_path, see export_crawl_results), and
+    upserts them into the embedded database at database_path, if given.
+    An interrupted crawl resumes where it stopped when called again with the same db_path;
+    once its results are exported the queue is cleared, so the next call starts a new crawl
+    (which also retries the tasks that failed this time).
+    Comment pages are planned from each product's freshly fetched review_count; with
+    request_budget, at most that many comment pages are requested, given to products in
+    the order their details come back.
+    """
+    print(f"\nStarting distributed crawl with {num_workers} workers (queue: {db_path})")
+
+    if not os.path.exists(input_path):
+        print(f"Error: ID file not found at {input_path}. Skipping.")
+        return pd.DataFrame()
+
+    queue = WorkQueue(db_path)
+    seed_crawl_queue(queue, input_path, max_comment_pages)
+
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(db_path,),
+                                kwargs={'worker_id': f'local-{i}', 'report_dir': report_dir, 'request_budget': request_budget})
+        for i in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    print(f"Queue status: {queue.counts()}")
+    _, df_comment = export_crawl_results(db_path, product_output_path, comment_output_path, dedup_index_path,
+                                         database_path)
+
+    # The crawl is complete: retire its tasks so the next run fetches fresh data
+    queue.clear()
+    return df_comment
@@ -0,0 +1,184 @@
+# Data-science-project\src\ingestion\resilience.py
+
+# === IMPORTS ===
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from src.monitoring import record_request
+
+# === CONSTANTS: RETRY POLICY ===
+# 429 = throttled, 5xx = transient server/gateway errors
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_EXCEPTIONS = (requests.Timeout, requests.ConnectionError)
+
+
+# === CIRCUIT BREAKER ===
+class CircuitBreaker:
+    """
+    Pauses all requests after failure_threshold consecutive retryable failures (the API is
+    throttling us or down). Once cooldown seconds have passed requests resume: a success
+    closes the circuit, while one more failure re-opens it for a doubled cooldown.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, max_cooldown=300.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._open_until > time.monotonic()
+
+    def before_request(self):
+        """Blocks while the circuit is open."""
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            print(f'\n[Circuit breaker] API is throttling/failing: pausing {remaining:.1f}s')
+            time.sleep(remaining)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._cooldown = self.base_cooldown
+
+    def record_failure(self, retry_after=None):
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            cooldown = max(self._cooldown, retry_after or 0)
+            self._open_until = time.monotonic() + cooldown
+            # Next trial starts from the threshold again, with a doubled cooldown
+            self._failures = self.failure_threshold - 1
+            self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+
+
+# === LATENCY TRACKER (FOR HEDGING) ===
+class LatencyTracker:
+    """Keeps a sliding window of recent latencies per endpoint and reports their p95."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency_s):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(latency_s)
+
+    def p95(self, endpoint):
+        """The 95th percentile latency, or None until min_samples have been observed."""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+# === RESILIENT HTTP CLIENT ===
+class ResilientClient:
+    """
+    Wraps requests.get with a timeout, jittered exponential-backoff retries on retryable
+    statuses and connection errors, a shared circuit breaker and, optionally, hedged
+    requests: when an attempt takes longer than the endpoint's p95 latency, a duplicate
+    is sent and whichever answers first is used. Every attempt is recorded in the run metrics.
+    """
+
+    def __init__(self, timeout=(5, 15), max_retries=4, backoff_base=0.5, backoff_max=30.0,
+                 breaker=None, hedge=False, hedge_workers=8):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.latencies = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers) if hedge else None
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honoring the server's Retry-After up to backoff_max."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, min(retry_after or 0, self.backoff_max))
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get('Retry-After') if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def _timed_send(self, endpoint, url, kwargs, is_retry):
+        """Sends one request, recording its latency and outcome."""
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=self.timeout, **kwargs)
+        except Exception:
+            record_request(endpoint, time.perf_counter() - start, error=True, retries=int(is_retry))
+            raise
+
+        latency = time.perf_counter() - start
+        record_request(endpoint, latency, status_code=response.status_code, retries=int(is_retry))
+        if response.status_code < 400:
+            self.latencies.add(endpoint, latency)
+        return response
+
+    def _send(self, endpoint, url, kwargs, is_retry):
+        """Sends a request, hedging it with a duplicate if it is slower than p95."""
+        hedge_after = self.latencies.p95(endpoint) if self.hedge else None
+        if hedge_after is None:
+            return self._timed_send(endpoint, url, kwargs, is_retry)
+
+        primary = self._executor.submit(self._timed_send, endpoint, url, kwargs, is_retry)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        hedged = self._executor.submit(self._timed_send, endpoint, url, kwargs, is_retry)
+        done, _ = wait([primary, hedged], return_when=FIRST_COMPLETED)
+        first = done.pop()
+        # Prefer a successful answer if the first one to finish raised
+        if first.exception() is not None:
+            other = hedged if first is primary else primary
+            return other.result()
+        return first.result()
+
+    def get(self, endpoint, url, **kwargs):
+        """
+        GETs the URL with retries. Returns the final response (which may still carry an error
+        status once retries are exhausted) or raises the last connection/timeout error.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_request()
+            response, error = None, None
+
+            try:
+                response = self._send(endpoint, url, kwargs, is_retry=attempt > 0)
+            except RETRYABLE_EXCEPTIONS as e:
+                error = e
+
+            if error is None and response.status_code not in RETRYABLE_STATUSES:
+                self.breaker.record_success()
+                return response
+
+            retry_after = self._retry_after(response)
+            self.breaker.record_failure(retry_after)
+
+            if attempt==self.max_retries:
+                break
+            time.sleep(self._backoff(attempt, retry_after))
+
+        if error is not None:
+            raise error
+        return response
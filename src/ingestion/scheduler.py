@@ -0,0 +1,70 @@
+# Data-science-project\src\ingestion\scheduler.py
+
+# === IMPORTS ===
+import math
+import os
+import pandas as pd
+
+
+# === PAGE COUNT FUNCTION ===
+def comment_page_count(review_count, max_comment_pages=5, page_limit=10):
+    """
+    Returns how many comment pages to request for a product: none for review_count 0,
+    ceil(review_count / page_limit) (at most max_comment_pages) for a known count, and
+    max_comment_pages when the count is unknown (the crawl then stops at the first empty page).
+    """
+    if review_count is None or pd.isna(review_count):
+        return max_comment_pages
+    if review_count <= 0:
+        return 0
+    return min(max_comment_pages, math.ceil(review_count / page_limit))
+
+
+# === COMMENT CRAWL PLANNING FUNCTION ===
+def plan_comment_crawl(input_path='data/product_id_sach.csv', product_details_path=None, max_comment_pages=5,
+                       page_limit=10, request_budget=None):
+    """
+    Plans how many comment pages to request per product from the known product metadata.
+
+    - Products with review_count 0 are skipped.
+    - Products with a known review_count get exactly ceil(review_count / page_limit) pages
+      (at most max_comment_pages) and are ordered by review_count, highest first.
+    - Products without metadata keep the old behavior (up to max_comment_pages, stopping at
+      the first empty page) and come last.
+    - With request_budget, pages are allocated in that order until the budget is spent.
+
+    Returns:
+        list: (product_id, pages, review_count or None) tuples in crawl order.
+    """
+    p_ids = pd.read_csv(input_path).id.dropna().astype('int64').drop_duplicates()
+
+    review_counts = pd.Series(dtype='float64')
+    if (product_details_path and os.path.exists(product_details_path)
+            and 'review_count' in pd.read_csv(product_details_path, nrows=0).columns):
+        df_details = pd.read_csv(product_details_path, usecols=['id', 'review_count']).dropna(subset=['id'])
+        review_counts = df_details.set_index(df_details['id'].astype('int64'))['review_count']
+        review_counts = review_counts[~review_counts.index.duplicated(keep='last')]
+
+    counts = review_counts.reindex(p_ids.to_numpy())
+    known = counts.dropna()
+    skipped = int((known <= 0).sum())
+    known = known[known > 0].sort_values(ascending=False, kind='stable')
+    unknown = counts.index[counts.isna()]
+
+    plan = [(int(pid), comment_page_count(rc, max_comment_pages, page_limit), int(rc)) for pid, rc in known.items()]
+    plan += [(int(pid), max_comment_pages, None) for pid in unknown]
+
+    if request_budget is not None:
+        budgeted, remaining = [], request_budget
+        for pid, pages, rc in plan:
+            if remaining <= 0:
+                break
+            budgeted.append((pid, min(pages, remaining), rc))
+            remaining -= pages
+        plan = budgeted
+
+    naive_requests = len(p_ids) * max_comment_pages
+    planned_requests = sum(pages for _, pages, _ in plan)
+    print(f"[Scheduler] {len(plan)} products planned ({skipped} skipped with 0 reviews, {len(unknown)} without metadata): "
+          f"at most {planned_requests} comment requests instead of {naive_requests}.")
+    return plan
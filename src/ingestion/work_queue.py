@@ -0,0 +1,234 @@
+# Data-science-project\src\ingestion\work_queue.py
+
+# === IMPORTS ===
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# === CONSTANTS: TASK STATUSES ===
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id       TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    last_error    TEXT,
+    updated_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, priority);
+CREATE TABLE IF NOT EXISTS results (
+    task_id TEXT NOT NULL,
+    seq     INTEGER NOT NULL,
+    kind    TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_results_kind ON results (kind);
+"""
+
+
+# === DURABLE WORK QUEUE (SQLITE) ===
+class WorkQueue:
+    """
+    A durable task queue stored in a single SQLite file, shared by any number of worker
+    processes on one host. The file uses WAL journaling, which relies on shared memory
+    between the processes, so it must live on a local disk: SQLite does not support WAL
+    over a network filesystem, and workers on several hosts must not share it.
+
+    Workers lease a task for lease_seconds; a lease that expires without completion is
+    handed to another worker. A task's results are written in the same transaction that
+    marks it done, and only while the caller still holds the lease, so every task's
+    results are recorded exactly once even when a slow worker's lease was re-issued.
+    """
+
+    def __init__(self, db_path, lease_seconds=120, max_attempts=5):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        with self._connect() as conn:
+            # WAL lets workers read while one writes (local disk only, see the class docstring)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """Opens a connection in autocommit mode (transactions are managed explicitly)."""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout=60000')
+        return _ClosingConnection(conn)
+
+    @contextmanager
+    def _transaction(self):
+        """Runs a block inside a write-locked (IMMEDIATE) transaction."""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    # --- PRODUCER API ---
+    def enqueue(self, tasks):
+        """
+        Adds tasks given as (task_id, kind, payload_dict, priority) tuples.
+        Tasks whose ID already exists are ignored. Returns the number of new tasks.
+        """
+        with self._transaction() as conn:
+            return self._insert_tasks(conn, tasks)
+
+    @staticmethod
+    def _insert_tasks(conn, tasks):
+        now = time.time()
+        rows = [(task_id, kind, json.dumps(payload), priority, now) for task_id, kind, payload, priority in tasks]
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO tasks (task_id, kind, payload, priority, updated_at) VALUES (?, ?, ?, ?, ?)', rows)
+        return conn.total_changes - before
+
+    # --- WORKER API ---
+    def lease(self, worker_id):
+        """
+        Leases the highest-priority available task (pending, or leased with an expired lease).
+
+        Returns:
+            dict or None: The leased task, or None if nothing is currently available.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases on a task's last attempt are given up on
+            conn.execute(
+                """UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL,
+                   last_error = 'lease expired', updated_at = ?
+                   WHERE status = ? AND lease_expires < ? AND attempts >= ?""",
+                (STATUS_FAILED, now, STATUS_LEASED, now, self.max_attempts))
+
+            row = conn.execute(
+                """SELECT task_id, kind, payload, attempts FROM tasks
+                   WHERE (status = ? OR (status = ? AND lease_expires < ?)) AND attempts < ?
+                   ORDER BY priority DESC, task_id LIMIT 1""",
+                (STATUS_PENDING, STATUS_LEASED, now, self.max_attempts)).fetchone()
+
+            if row is None:
+                return None
+
+            task_id, kind, payload, attempts = row
+            conn.execute(
+                """UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = ?, updated_at = ?
+                   WHERE task_id = ?""",
+                (STATUS_LEASED, worker_id, now + self.lease_seconds, attempts + 1, now, task_id))
+
+        return {'task_id': task_id, 'kind': kind, 'payload': json.loads(payload),
+                'attempt': attempts + 1, 'worker_id': worker_id}
+
+    def _still_leased(self, conn, task):
+        """Checks (inside a transaction) that the caller's lease on the task is still current."""
+        row = conn.execute(
+            'SELECT status, lease_owner, attempts FROM tasks WHERE task_id = ?', (task['task_id'],)).fetchone()
+        return row is not None and row==(STATUS_LEASED, task['worker_id'], task['attempt'])
+
+    @staticmethod
+    def _within_budget(conn, tasks, budget):
+        """Keeps the tasks that fit in a budget of at most `budget` queued tasks per kind."""
+        kept, counts = [], {}
+        for task in tasks:
+            kind = task[1]
+            if kind not in counts:
+                counts[kind] = conn.execute('SELECT COUNT(*) FROM tasks WHERE kind = ?', (kind,)).fetchone()[0]
+            if counts[kind] < budget:
+                kept.append(task)
+                counts[kind] += 1
+        return kept
+
+    def complete(self, task, records=(), follow_up_tasks=(), follow_up_budget=None):
+        """
+        Atomically stores the task's result records, enqueues follow-up tasks and marks it done.
+        With follow_up_budget, follow-ups are only added while the queue holds fewer than that
+        many tasks of their kind (checked in the same transaction, so workers cannot overshoot).
+
+        Returns:
+            bool: False if the lease was lost to another worker (nothing is written).
+        """
+        with self._transaction() as conn:
+            if not self._still_leased(conn, task):
+                return False
+            if follow_up_budget is not None:
+                follow_up_tasks = self._within_budget(conn, follow_up_tasks, follow_up_budget)
+
+            conn.executemany(
+                'INSERT OR REPLACE INTO results (task_id, seq, kind, data) VALUES (?, ?, ?, ?)',
+                [(task['task_id'], seq, task['kind'], json.dumps(record)) for seq, record in enumerate(records)])
+            self._insert_tasks(conn, follow_up_tasks)
+            conn.execute(
+                'UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE task_id = ?',
+                (STATUS_DONE, time.time(), task['task_id']))
+        return True
+
+    def fail(self, task, error):
+        """Releases a task after a failed attempt; it is retried until max_attempts is reached."""
+        with self._transaction() as conn:
+            if not self._still_leased(conn, task):
+                return
+            status = STATUS_FAILED if task['attempt'] >= self.max_attempts else STATUS_PENDING
+            conn.execute(
+                """UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+                   WHERE task_id = ?""",
+                (status, str(error), time.time(), task['task_id']))
+
+    def clear(self):
+        """Removes every task and stored result, so the next seeding starts a new crawl."""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM results')
+            conn.execute('DELETE FROM tasks')
+
+    # --- MONITORING / EXPORT API ---
+    def counts(self):
+        """Returns the number of tasks per status."""
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+
+    def has_open_tasks(self):
+        """True while any task is pending or leased."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT 1 FROM tasks WHERE status IN (?, ?) LIMIT 1', (STATUS_PENDING, STATUS_LEASED)).fetchone()
+            return row is not None
+
+    def iter_results(self, kind):
+        """
+        Yields the stored result records of all tasks of the given kind, ordered by the
+        payload's numeric product_id and page (text task IDs would sort page 10 before 2).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT r.data FROM results r JOIN tasks t ON t.task_id = r.task_id
+                   WHERE r.kind = ?
+                   ORDER BY json_extract(t.payload, '$.product_id'), json_extract(t.payload, '$.page'), r.seq""",
+                (kind,))
+            for (data,) in rows:
+                yield json.loads(data)
+
+
+# === CONNECTION WRAPPER (INTERNAL) ===
+class _ClosingConnection:
+    """Context manager that closes the SQLite connection on exit (sqlite3's own only commits)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.close()
@@ -0,0 +1,310 @@
+# Data-science-project\src\monitoring.py
+
+# === IMPORTS ===
+import bisect
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+# psutil (optional) reads the current RSS on every platform, including Windows
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# === CONSTANTS: LATENCY HISTOGRAM BUCKETS ===
+# Upper bounds (milliseconds) of the request-latency histogram; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+# === CONSTANTS: MEMORY SAMPLING ===
+# How often (seconds) a running stage's resident set size is sampled.
+RSS_SAMPLE_INTERVAL_S = 0.05
+_STATM_PATH = '/proc/self/statm'
+
+
+# === MEMORY HELPER FUNCTIONS ===
+def _peak_rss_mb():
+    """Returns the peak resident set size of the process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform=='darwin' else 1024
+    return round(peak / divisor, 2)
+
+
+def _current_rss_mb():
+    """
+    Returns the current resident set size of the process in MB: from psutil if installed,
+    else /proc (Linux). Elsewhere (macOS) the peak RSS so far is the closest available
+    figure; without psutil or resource (Windows) it returns None.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+    try:
+        with open(_STATM_PATH) as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class _RssSampler:
+    """
+    Samples the current RSS in a background thread while a stage runs, so the stage
+    reports its own start and peak memory rather than the process high-water mark
+    (ru_maxrss never goes down, so it cannot be attributed to a single stage).
+    Allocations shorter than the sampling interval may be missed.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.start_mb = _current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = None
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+            self._thread.start()
+
+    def observe(self, rss_mb):
+        """Raises the peak to rss_mb if higher (e.g. the peak of a nested stage)."""
+        if rss_mb is not None and self.peak_mb is not None and rss_mb > self.peak_mb:
+            self.peak_mb = rss_mb
+
+    def _sample(self):
+        self.observe(_current_rss_mb())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        """Stops sampling and returns the stage's memory fields for the report."""
+        if self._thread is None:
+            return {'rss_start_mb': None, 'peak_rss_mb': None, 'rss_delta_mb': None}
+
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return {
+            'rss_start_mb': round(self.start_mb, 2),
+            'peak_rss_mb': round(self.peak_mb, 2),
+            'rss_delta_mb': round(self.peak_mb - self.start_mb, 2),
+        }
+
+
+# === REQUEST STATISTICS (INTERNAL) ===
+def _new_request_stats():
+    """Creates an empty statistics record for one HTTP endpoint."""
+    return {
+        'count': 0,
+        'errors': 0,
+        'retries': 0,
+        'status_codes': {},
+        'latency_sum_s': 0.0,
+        'latency_min_s': None,
+        'latency_max_s': None,
+        'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    }
+
+
+def _format_request_stats(stats):
+    """Converts an internal request statistics record into its JSON report form."""
+    labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+    count = stats['count']
+    return {
+        'count': count,
+        'errors': stats['errors'],
+        'error_rate': round(stats['errors'] / count, 4) if count else 0.0,
+        'retries': stats['retries'],
+        'status_codes': stats['status_codes'],
+        'latency_mean_s': round(stats['latency_sum_s'] / count, 4) if count else None,
+        'latency_min_s': stats['latency_min_s'],
+        'latency_max_s': stats['latency_max_s'],
+        'latency_histogram': dict(zip(labels, stats['histogram'])),
+    }
+
+
+# === RUN METRICS COLLECTOR ===
+class RunMetrics:
+    """
+    Collects structured metrics for one pipeline run: per-stage duration, row counts,
+    throughput and memory (RSS at stage start, the stage's own sampled peak and the
+    growth between them), plus per-endpoint HTTP latency/error/retry statistics.
+    When profile_dir is set, every top-level stage is also profiled with cProfile.
+    """
+
+    def __init__(self, run_name='pipeline', profile_dir=None):
+        self.run_name = run_name
+        self.profile_dir = profile_dir
+        self.started_at = datetime.now()
+        self.stages = []
+        self.requests = {}
+        self._active_stages = []
+        self._samplers = []
+        self._profiling = False
+        self._profile_count = 0
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager that times a stage and yields its (mutable) record."""
+        record = {'stage': name, 'rows': None, 'status': 'ok'}
+        self._active_stages.append(record)
+
+        # cProfile cannot nest, so only the outermost profiled stage gets a dump
+        profiler = None
+        if self.profile_dir and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            profiler.enable()
+
+        sampler = _RssSampler()
+        self._samplers.append(sampler)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception:
+            record['status'] = 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            memory = sampler.stop()
+            self._samplers.pop()
+            # A peak seen by a nested stage is also a peak of every enclosing stage
+            for parent in self._samplers:
+                parent.observe(sampler.peak_mb)
+
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                os.makedirs(self.profile_dir, exist_ok=True)
+                # Run timestamp plus a per-run sequence number: neither a re-run nor a repeated stage overwrites a dump
+                self._profile_count += 1
+                timestamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+                profile_path = os.path.join(self.profile_dir,
+                                            f'{self.run_name}_{timestamp}_{self._profile_count:03d}_{name}.prof')
+                profiler.dump_stats(profile_path)
+                record['profile_path'] = profile_path
+
+            rows = record['rows']
+            record['duration_s'] = round(elapsed, 4)
+            record['rows_per_s'] = round(rows / elapsed, 2) if rows and elapsed > 0 else None
+            record.update(memory)
+
+            self._active_stages.pop()
+            self.stages.append(record)
+
+    def set_rows(self, rows):
+        """Sets the processed row count of the innermost active stage."""
+        if self._active_stages:
+            self._active_stages[-1]['rows'] = int(rows)
+
+    def record_request(self, endpoint, latency_s, status_code=None, error=False, retries=0):
+        """Records the outcome and latency of one HTTP request against an endpoint."""
+        stats = self.requests.setdefault(endpoint, _new_request_stats())
+        stats['count'] += 1
+        stats['retries'] += retries
+
+        if error or status_code is None or status_code >= 400:
+            stats['errors'] += 1
+        if status_code is not None:
+            key = str(status_code)
+            stats['status_codes'][key] = stats['status_codes'].get(key, 0) + 1
+
+        latency_s = round(latency_s, 4)
+        stats['latency_sum_s'] += latency_s
+        if stats['latency_min_s'] is None or latency_s < stats['latency_min_s']:
+            stats['latency_min_s'] = latency_s
+        if stats['latency_max_s'] is None or latency_s > stats['latency_max_s']:
+            stats['latency_max_s'] = latency_s
+        stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, latency_s * 1000)] += 1
+
+    def to_dict(self):
+        """Returns the full run report as a JSON-serializable dictionary."""
+        return {
+            'run_name': self.run_name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'process_peak_rss_mb': _peak_rss_mb(),
+            'stages': self.stages,
+            'requests': {endpoint: _format_request_stats(stats) for endpoint, stats in self.requests.items()},
+        }
+
+    def save(self, output_dir='reports/run_reports'):
+        """Writes the run report to a timestamped JSON file and returns its path."""
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        output_path = os.path.join(output_dir, f'{self.run_name}_{timestamp}.json')
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+        print(f"📊 Run report saved to: {output_path}")
+        return output_path
+
+
+# === MODULE-LEVEL RUN (SHARED BY ALL PIPELINE MODULES) ===
+_current_run = RunMetrics()
+
+
+def start_run(run_name, profile_dir=None):
+    """Starts a new metrics run that all instrumented stages and requests report into."""
+    global _current_run
+    _current_run = RunMetrics(run_name=run_name, profile_dir=profile_dir)
+    return _current_run
+
+
+def get_run():
+    """Returns the currently active metrics run."""
+    return _current_run
+
+
+def stage(name):
+    """Context manager timing a named stage of the current run."""
+    return _current_run.stage(name)
+
+
+def set_stage_rows(rows):
+    """Sets the row count reported for the innermost active stage of the current run."""
+    _current_run.set_rows(rows)
+
+
+def record_request(endpoint, latency_s, status_code=None, error=False, retries=0):
+    """Records one HTTP request in the current run."""
+    _current_run.record_request(endpoint, latency_s, status_code=status_code, error=error, retries=retries)
+
+
+def track_stage(name):
+    """
+    Decorator that records the wrapped function as a stage of the current run.
+    If the function returns a sized object (e.g. a DataFrame) its length is used
+    as the row count, unless the function already called set_stage_rows().
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _current_run.stage(name) as record:
+                result = func(*args, **kwargs)
+                if record['rows'] is None and hasattr(result, '__len__'):
+                    record['rows'] = len(result)
+                return result
+
+        return wrapper
+
+    return decorator
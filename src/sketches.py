@@ -0,0 +1,408 @@
+# Data-science-project\src\sketches.py
+
+# === IMPORTS ===
+import json
+import math
+import os
+import random
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.monitoring import track_stage
+
+# === CONSTANTS: SKETCH PARAMETERS AND ERROR BOUNDS ===
+# KLL with k=200 keeps ~600 items per group; quantiles are within about 1.7% normalized rank
+# error (e.g. the reported median lies between the true 48.3% and 51.7% quantiles) with
+# ~99% probability, and are exact while a group holds fewer than k values. Reported quantiles
+# are retained data values (no interpolation between neighbours as in pandas' quantile).
+KLL_K = 200
+# HyperLogLog with 2^12 registers (4 KB per group): distinct counts have ~1.6% standard error.
+HLL_PRECISION = 12
+# Count, mean, std, min and max are exact (Welford/Chan moments).
+
+
+# === WELFORD MOMENTS ===
+class Moments:
+    """Exact, mergeable count / mean / variance / min / max (Welford, Chan et al. merge)."""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, min_value=math.inf, max_value=-math.inf):
+        self.n, self.mean, self.m2 = n, mean, m2
+        self.min, self.max = min_value, max_value
+
+    def update(self, values):
+        """Adds a batch of values (vectorized: batch moments, then one merge)."""
+        values = np.asarray(values, dtype='float64')
+        if values.size:
+            self.merge(Moments(values.size, float(values.mean()), float(((values - values.mean()) ** 2).sum()),
+                               float(values.min()), float(values.max())))
+
+    def merge(self, other):
+        if other.n==0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1, like pandas)."""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float('nan')
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['n'], d['mean'], d['m2'], d['min'], d['max'])
+
+
+# === KLL QUANTILE SKETCH ===
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang, Liberty 2016). Items at level h stand for 2^h
+    original values; a full level is sorted and every other item is promoted.
+    """
+
+    def __init__(self, k=KLL_K, c=2 / 3):
+        self.k, self.c = k, c
+        self.n = 0
+        self.compactors = [[]]
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def _size(self):
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for level, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1==len(self.compactors):
+                        self.compactors.append([])
+                    compactor.sort()
+                    # Keep one item back if the level holds an odd number of items
+                    leftover = [compactor.pop()] if len(compactor) % 2 else []
+                    self.compactors[level + 1].extend(compactor[random.randint(0, 1)::2])
+                    self.compactors[level] = leftover
+                    break
+
+    def update(self, values):
+        """Adds a batch of values."""
+        for value in np.asarray(values, dtype='float64').tolist():
+            self.compactors[0].append(value)
+            self.n += 1
+            if len(self.compactors[0]) >= self._capacity(0):
+                self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or NaN for an empty sketch."""
+        weighted = sorted((value, 2 ** level) for level, compactor in enumerate(self.compactors) for value in compactor)
+        if not weighted:
+            return float('nan')
+
+        total = sum(weight for _, weight in weighted)
+        target, cumulative = q * total, 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+    def values_between(self, low, high):
+        """Retained sample values within [low, high] (used for approximate whisker ends)."""
+        return [value for compactor in self.compactors for value in compactor if low <= value <= high]
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(k=d['k'])
+        sketch.n, sketch.compactors = d['n'], d['compactors']
+        return sketch
+
+
+# === HYPERLOGLOG DISTINCT COUNTER ===
+class HyperLogLog:
+    """Mergeable distinct-count sketch with 2^p one-byte registers."""
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        """Adds a batch of values (hashed with pandas' deterministic 64-bit hash)."""
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return
+
+        # Integer IDs read as float (columns with NaN) must hash like their int64 form
+        if pd.api.types.is_float_dtype(values) and (values % 1==0).all():
+            values = values.astype('int64')
+
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Rank = position of the leftmost 1-bit within the remaining 64-p bits
+        bit_length = np.where(remaining > 0, np.frexp(remaining.astype(np.float64))[1], 0)
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers==0))
+        # Small-range correction: linear counting
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'p': self.p, 'registers': self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['p'], np.array(d['registers'], dtype=np.uint8))
+
+
+# === PER-GROUP SUMMARY ===
+class GroupSummary:
+    """Rating moments and quantiles plus distinct customers for one brand or month."""
+
+    def __init__(self, moments=None, quantiles=None, customers=None):
+        self.moments = moments or Moments()
+        self.quantiles = quantiles or KLLSketch()
+        self.customers = customers or HyperLogLog()
+
+    def update(self, ratings, customer_ids):
+        self.moments.update(ratings)
+        self.quantiles.update(ratings)
+        self.customers.update(customer_ids)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.customers.merge(other.customers)
+        return self
+
+    def box_stats(self, label):
+        """Matplotlib bxp() statistics; whiskers end at the most extreme retained value within 1.5 IQR."""
+        q1, median, q3 = (self.quantiles.quantile(q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        inner = self.quantiles.values_between(q1 - 1.5 * iqr, q3 + 1.5 * iqr) or [median]
+        return {'label': label, 'med': median, 'q1': q1, 'q3': q3,
+                'whislo': max(min(inner), self.moments.min), 'whishi': min(max(inner), self.moments.max),
+                'mean': self.moments.mean, 'fliers': []}
+
+    def to_dict(self):
+        return {'moments': self.moments.to_dict(), 'quantiles': self.quantiles.to_dict(),
+                'customers': self.customers.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(Moments.from_dict(d['moments']), KLLSketch.from_dict(d['quantiles']),
+                   HyperLogLog.from_dict(d['customers']))
+
+
+# === REVIEW SUMMARIES (PER BRAND AND PER MONTH) ===
+class ReviewSummaries:
+    """
+    Mergeable rating summaries per brand and per month (YYYYMM). Build one per crawl batch
+    with update(), combine batches with merge() in O(sketch size), and persist as JSON.
+    reviews counts every row passed to update(), so a saved summary tells how many
+    reviews it covers.
+    """
+
+    def __init__(self):
+        self.by_brand = {}
+        self.by_month = {}
+        self.reviews = 0
+
+    @staticmethod
+    def _update_groups(groups, df, keys):
+        for key, part in df.groupby(keys, sort=False):
+            groups.setdefault(key, GroupSummary()).update(part['rating'], part.get('customer_id'))
+
+    def update(self, df: pd.DataFrame):
+        """Adds a batch of merged review rows (needs rating, and brand_name and/or created_month)."""
+        self.reviews += len(df)
+        df = df.assign(rating=pd.to_numeric(df['rating'], errors='coerce')).dropna(subset=['rating'])
+
+        if 'brand_name' in df.columns:
+            rated = df.dropna(subset=['brand_name'])
+            self._update_groups(self.by_brand, rated, rated['brand_name'].astype(str).str.strip())
+
+        if 'created_month' in df.columns:
+            # Month keys are stored as 'YYYYMM' strings so they survive the JSON round-trip
+            months = pd.to_numeric(df['created_month'], errors='coerce')
+            rated = df[months.notna()]
+            self._update_groups(self.by_month, rated, months[months.notna()].astype('int64').astype(str))
+        return self
+
+    def merge(self, other):
+        self.reviews += other.reviews
+        for mine, theirs in ((self.by_brand, other.by_brand), (self.by_month, other.by_month)):
+            for key, summary in theirs.items():
+                if key in mine:
+                    mine[key].merge(summary)
+                else:
+                    mine[key] = summary
+        return self
+
+    @staticmethod
+    def _stats_frame(groups):
+        rows = []
+        for key, summary in groups.items():
+            m = summary.moments
+            rows.append({'key': key, 'count': m.n, 'mean': m.mean, 'std': m.std, 'min': m.min,
+                         'q1': summary.quantiles.quantile(0.25), 'median': summary.quantiles.quantile(0.5),
+                         'q3': summary.quantiles.quantile(0.75), 'max': m.max,
+                         'distinct_customers': summary.customers.count()})
+        return pd.DataFrame(rows, columns=['key', 'count', 'mean', 'std', 'min', 'q1', 'median', 'q3', 'max',
+                                           'distinct_customers'])
+
+    def brand_stats(self):
+        """Per-brand statistics (exact count/mean/std/min/max, approximate quartiles and distinct customers)."""
+        return self._stats_frame(self.by_brand).rename(columns={'key': 'brand_name'})
+
+    def month_stats(self):
+        """Per-month statistics in chronological order, with 'Month_Year' as 'YYYY-MM'."""
+        stats = self._stats_frame(self.by_month).sort_values('key', ignore_index=True)
+        keys = stats.pop('key').astype(str)
+        stats.insert(0, 'Month_Year', keys.str[:4] + '-' + keys.str[4:])
+        return stats
+
+    def save(self, path):
+        data = {
+            'by_brand': {key: summary.to_dict() for key, summary in self.by_brand.items()},
+            'by_month': {key: summary.to_dict() for key, summary in self.by_month.items()},
+            'reviews': self.reviews,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        summaries = cls()
+        summaries.by_brand = {key: GroupSummary.from_dict(d) for key, d in data['by_brand'].items()}
+        summaries.by_month = {key: GroupSummary.from_dict(d) for key, d in data['by_month'].items()}
+        summaries.reviews = data.get('reviews', 0)
+        return summaries
+
+
+# === SUMMARY FILE HELPERS ===
+def is_summary_path(path):
+    """True if the path points to a saved ReviewSummaries JSON file."""
+    return str(path).lower().endswith('.json')
+
+
+def merge_summary_files(paths, output_path=None):
+    """Merges the summaries of several batches; optionally saves the result."""
+    merged = ReviewSummaries()
+    for path in paths:
+        merged.merge(ReviewSummaries.load(path))
+    if output_path:
+        merged.save(output_path)
+    return merged
+
+
+# === SUMMARIZED REVIEW INDEX (INTERNAL) ===
+def _new_comment_ids(conn, comment_ids):
+    """
+    Returns the IDs of one chunk that are not in the summarized index yet and records them
+    there (uncommitted, so they are only kept once the batch summary has been saved).
+    """
+    conn.execute('DELETE FROM chunk_ids')
+    conn.executemany('INSERT OR IGNORE INTO chunk_ids (comment_id) VALUES (?)', ((int(v),) for v in comment_ids))
+    new_ids = [row[0] for row in conn.execute(
+        'SELECT comment_id FROM chunk_ids WHERE comment_id NOT IN (SELECT comment_id FROM summarized)')]
+    conn.executemany('INSERT INTO summarized (comment_id) VALUES (?)', ((v,) for v in new_ids))
+    return new_ids
+
+
+# === INCREMENTAL SUMMARY UPDATE FUNCTION ===
+@track_stage('update_review_summaries')
+def update_review_summaries(input_path, summary_path, index_path, batch_dir=None, chunksize=100_000):
+    """
+    Summarizes only the reviews of a merged CSV that are not in summary_path yet, saves them
+    as one batch summary (in batch_dir, if given) and merges that batch into summary_path.
+
+    index_path records the comment IDs already summarized, so every review is counted once
+    however often the merged file is rebuilt. The index and summary_path must describe the
+    same reviews: when summary_path is missing, or its review count differs from the
+    index's (the index was lost, or a run stopped between saving one and committing the
+    other), both are rebuilt from input_path.
+    Reviews are summarized when first seen (later edits to a review are not re-counted).
+
+    Returns:
+        ReviewSummaries or None: The new batch's summaries, or None if there was nothing new.
+    """
+    header = pd.read_csv(input_path, nrows=0).columns
+    columns = [col for col in ('comment_id', 'rating', 'brand_name', 'created_month', 'customer_id') if col in header]
+
+    batch = ReviewSummaries()
+    new_rows = 0
+    with closing(sqlite3.connect(index_path)) as conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS summarized (comment_id INTEGER PRIMARY KEY)')
+        conn.execute('CREATE TEMP TABLE chunk_ids (comment_id INTEGER PRIMARY KEY)')
+
+        summary = ReviewSummaries.load(summary_path) if os.path.exists(summary_path) else None
+        indexed = conn.execute('SELECT COUNT(*) FROM summarized').fetchone()[0]
+        if summary is not None and summary.reviews!=indexed:
+            print(f"⚠️ WARNING: {summary_path} covers {summary.reviews} reviews but the index {indexed}; rebuilding both.")
+            summary = None
+        if summary is None:
+            conn.execute('DELETE FROM summarized')
+
+        for chunk in pd.read_csv(input_path, usecols=columns, chunksize=chunksize):
+            chunk = chunk.dropna(subset=['comment_id']).drop_duplicates(subset=['comment_id'])
+            new_ids = _new_comment_ids(conn, chunk['comment_id'])
+            if new_ids:
+                batch.update(chunk[chunk['comment_id'].astype('int64').isin(new_ids)])
+                new_rows += len(new_ids)
+
+        if not new_rows:
+            conn.commit()
+            print(f"No new reviews to summarize; {summary_path} is up to date.")
+            return None
+
+        if batch_dir:
+            os.makedirs(batch_dir, exist_ok=True)
+            batch.save(os.path.join(batch_dir, f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"))
+        merged = (summary or ReviewSummaries()).merge(batch)
+        merged.save(summary_path)
+
+        # The index may only remember the batch once the running summary contains it
+        conn.commit()
+
+    print(f"✅ Merged a batch of {new_rows} new reviews into {summary_path} "
+          f"({len(merged.by_brand)} brands, {len(merged.by_month)} months).")
+    return batch
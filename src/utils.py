@@ -3,9 +3,42 @@
 # === IMPORTS ===
 import pandas as pd
 import numpy as np
+from src.monitoring import track_stage
+
+
+# === TIMESTAMP HELPER FUNCTIONS ===
+def epoch_to_month_key(epoch_seconds: pd.Series):
+    """Converts Unix epoch seconds to an integer month key YYYYMM (nullable Int64)."""
+    dt = pd.to_datetime(pd.to_numeric(epoch_seconds, errors='coerce'), unit='s', errors='coerce')
+    return (dt.dt.year * 100 + dt.dt.month).astype('Int64')
+
+
+def get_month_key(df: pd.DataFrame):
+    """
+    Returns the YYYYMM month key of each review: the precomputed 'created_month' column when
+    present, otherwise derived from 'created_at' (epoch seconds, datetime64, or - for files
+    written by older versions - 'YYYY-MM-DD HH:MM:SS' text parsed with an explicit format).
+    """
+    if 'created_month' in df.columns:
+        return pd.to_numeric(df['created_month'], errors='coerce').astype('Int64')
+
+    created_at = df['created_at']
+    if pd.api.types.is_numeric_dtype(created_at):
+        return epoch_to_month_key(created_at)
+
+    if not pd.api.types.is_datetime64_any_dtype(created_at):
+        created_at = pd.to_datetime(created_at, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    return (created_at.dt.year * 100 + created_at.dt.month).astype('Int64')
+
+
+def format_month_key(month_keys: pd.Series):
+    """Formats integer YYYYMM month keys as 'YYYY-MM' labels."""
+    month_keys = month_keys.astype('int64')
+    return (month_keys // 100).astype(str) + '-' + (month_keys % 100).astype(str).str.zfill(2)
 
 
 # === PRODUCT DATA CLEANING FUNCTION ===
+@track_stage('clean_product_data')
 def clean_product_data(df: pd.DataFrame):
     """
     Cleans the product details DataFrame: drops missing IDs, removes unnecessary
@@ -58,10 +91,12 @@ def clean_product_data(df: pd.DataFrame):
 
 
 # === COMMENTS DATA CLEANING FUNCTION ===
+@track_stage('clean_comments_data')
 def clean_comments_data(df: pd.DataFrame):
     """
     Cleans the comments DataFrame: drops rows missing critical fields (id, rating, product_id),
-    converts date columns, standardizes rating type, and fills missing strings.
+    types date columns as epoch seconds with a YYYYMM month key, standardizes rating type,
+    and fills missing strings.
     """
     print("\n[Cleaning] Starting comments data cleaning...")
     df_cleaned = df.copy()
@@ -82,12 +117,15 @@ def clean_comments_data(df: pd.DataFrame):
     current_rows = len(df_cleaned)
     print(f"  - Dropped {initial_rows - current_rows} rows missing basic data. {current_rows} rows remaining.")
 
-    # 3. Convert timestamp columns to datetime objects
+    # 3. Keep timestamp columns as typed integer epoch seconds (no text round-trip through CSV)
     date_cols = ['created_at', 'purchased_at']
     for col in date_cols:
         if col in df_cleaned.columns:
-            # Convert Unix timestamp (seconds) to datetime
-            df_cleaned[col] = pd.to_datetime(df_cleaned[col], unit='s', errors='coerce')
+            df_cleaned[col] = pd.to_numeric(df_cleaned[col], errors='coerce').astype('Int64')
+
+    # 3b. Precompute the integer month key (YYYYMM) used by the time-series analysis
+    if 'created_at' in df_cleaned.columns:
+        df_cleaned['created_month'] = epoch_to_month_key(df_cleaned['created_at'])
 
     # 4. Standardize 'rating' column
     df_cleaned['rating'] = pd.to_numeric(df_cleaned['rating'], errors='coerce').fillna(0).astype(int)
@@ -103,6 +141,7 @@ def clean_comments_data(df: pd.DataFrame):
 
 
 # === DATA MERGING FUNCTION ===
+@track_stage('merge_product_and_comment_data')
 def merge_product_and_comment_data(product_df: pd.DataFrame, comment_df: pd.DataFrame):
     """
     Merges the cleaned product and comment DataFrames based on product ID.
@@ -5,34 +5,54 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from src.database import is_database_path, query_box_plot_data
+from src.monitoring import set_stage_rows, track_stage
+from src.sketches import ReviewSummaries, is_summary_path
+from src.visualization.data_loader import DEFAULT_MEMORY_BUDGET_MB, load_plot_data
+
+# === CONSTANTS: COLUMNS READ FROM THE MERGED CSV ===
+BOX_PLOT_COLUMNS = {'brand_name': 'str', 'rating': 'float64', 'comment_id': 'float64'}
+
+
+# === CHUNK CLEANING FUNCTION (INTERNAL) ===
+def _clean_box_plot_chunk(chunk: pd.DataFrame):
+    """Drops rows missing a brand, rating or comment ID and keeps brand and integer rating."""
+    chunk = chunk.dropna(subset=['brand_name', 'rating', 'comment_id'])
+    return pd.DataFrame({
+        'brand_name': chunk['brand_name'].str.strip(),
+        'rating': chunk['rating'].astype(int),
+    })
 
 
 # === DATA PREPARATION FUNCTION (INTERNAL) ===
-def _prepare_box_plot_data(input_path: str, top_n: int):
+def _prepare_box_plot_data(input_path: str, top_n: int, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
-    Reads the data, cleans and filters it to prepare a DataFrame containing
-    only the Top N brands based on review count.
+    Reads the data (merged CSV or embedded database), cleans and filters it to prepare
+    a DataFrame containing only the Top N brands based on review count.
 
     Returns:
         pd.DataFrame or None: The filtered DataFrame, or None if data is insufficient.
     """
     try:
-        # Read data and handle critical missing values
-        data = pd.read_csv(input_path)
-        data = data.dropna(subset=['brand_name', 'rating', 'comment_id'])
+        # Embedded database: the filtering and Top N selection run as a single query
+        if is_database_path(input_path):
+            data = query_box_plot_data(input_path, top_n)
+
+            if data.empty:
+                print("⚠️ WARNING: Insufficient data for Top Brands to create the plot.")
+                return None
+
+            return data
 
-        # Data type casting and cleaning
-        data['brand_name'] = data['brand_name'].astype(str).str.strip()
-        data['rating'] = pd.to_numeric(data['rating'], errors='coerce')
-        data = data.dropna(subset=['rating'])
-        data['rating'] = data['rating'].astype(int)
+        # Read only the needed columns in chunks, cleaning each chunk as it is read
+        data = load_plot_data(input_path, BOX_PLOT_COLUMNS, _clean_box_plot_chunk, memory_budget_mb)
 
         # Identify Top N brands
-        brand_counts = data.groupby('brand_name')['comment_id'].size().sort_values(ascending=False)
+        brand_counts = data.groupby('brand_name').size().sort_values(ascending=False)
         top_brands = brand_counts.head(top_n).index.tolist()
 
         # Filter the DataFrame
-        data = data[data['brand_name'].isin(top_brands)].copy()
+        data = data[data['brand_name'].isin(top_brands)]
 
         if data.empty:
             print("⚠️ WARNING: Insufficient data for Top Brands to create the plot.")
@@ -48,10 +68,62 @@ def _prepare_box_plot_data(input_path: str, top_n: int):
         return None
 
 
+# === BOX PLOT FROM MERGEABLE SUMMARIES (INTERNAL) ===
+def _create_box_plot_from_summaries(input_path, output_path, top_n):
+    """
+    Draws the Top N brands' box plot from saved ReviewSummaries instead of raw rows.
+    Quartiles are approximate (KLL, ~1.7% rank error); means and counts are exact;
+    outliers are not drawn because the summaries do not keep individual ratings.
+    """
+    try:
+        summaries = ReviewSummaries.load(input_path)
+        brand_stats = summaries.brand_stats()
+
+        if brand_stats.empty:
+            print("⚠️ WARNING: Insufficient data for Top Brands to create the plot.")
+            return
+
+        # Top N brands by review count, ordered by average rating (descending)
+        top_brands = brand_stats.nlargest(top_n, 'count').sort_values('mean', ascending=False)
+        set_stage_rows(top_brands['count'].sum())
+        box_stats = [summaries.by_brand[brand].box_stats(brand) for brand in top_brands['brand_name']]
+
+        plt.figure(figsize=(14, 8))
+        plt.gca().bxp(box_stats, showfliers=False, patch_artist=True,
+                      boxprops={'facecolor': '#66c2a5'}, medianprops={'color': 'black'})
+
+        plt.title(f'Rating Distribution (Box Plot) for Top {top_n} Brands (approximate)', fontsize=16, fontweight='bold')
+        plt.xlabel('Brand (Ordered by Avg Rating)', fontsize=12, fontweight='bold')
+        plt.ylabel('Rating Score (1-5 Stars)', fontsize=12, fontweight='bold')
+
+        plt.yticks(ticks=[1, 2, 3, 4, 5])
+        plt.ylim(0.5, 5.5)
+        plt.xticks(rotation=45, ha='right')
+        plt.grid(axis='y', linestyle='--', alpha=0.6)
+
+        plt.tight_layout()
+        plt.savefig(output_path, dpi=300)
+        plt.close()
+
+        print(f"✅ Box Plot successfully saved to: {output_path}")
+
+        analysis_data = top_brands.set_index('brand_name')[['mean', 'median', 'min', 'max', 'std', 'distinct_customers']]
+        analysis_data.insert(5, 'IQR', top_brands.set_index('brand_name').eval('q3 - q1'))
+
+        print(f"\n--- Rating Dispersion Statistics by Brand (Top {top_n}, approximate quartiles) ---")
+        print(analysis_data.to_markdown())
+
+    except Exception as e:
+        print(f"❌ ERROR during Box Plot creation from summaries: {e}")
+
+
 # === BOX PLOT FUNCTION: RATING DISTRIBUTION BY TOP N BRANDS ===
-def create_box_plot(input_path, output_path, top_n=10):
+@track_stage('box_plot')
+def create_box_plot(input_path, output_path, top_n=10, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
     Creates a Box Plot to analyze the distribution of rating scores for the Top N Brands.
+    input_path may be the merged CSV, the embedded database or a saved summaries JSON file;
+    a CSV is read in chunks within memory_budget_mb.
     """
     print(f"\n[Visualization] Starting Box Plot creation for Top {top_n} Brands from: {input_path}")
 
@@ -62,11 +134,17 @@ def create_box_plot(input_path, output_path, top_n=10):
         print(f"⚠️ ERROR: File not found at path: {input_path}")
         return
 
-    data = _prepare_box_plot_data(input_path, top_n)
+    if is_summary_path(input_path):
+        _create_box_plot_from_summaries(input_path, output_path, top_n)
+        return
+
+    data = _prepare_box_plot_data(input_path, top_n, memory_budget_mb)
 
     if data is None:
         return
 
+    set_stage_rows(len(data))
+
     try:
         # Determine the order of box plots based on average rating (descending)
         brand_order = data.groupby('brand_name')['rating'].mean().sort_values(ascending=False).index.tolist()
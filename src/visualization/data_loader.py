@@ -0,0 +1,58 @@
+# Data-science-project\src\visualization\data_loader.py
+
+# === IMPORTS ===
+import pandas as pd
+
+# === CONSTANTS: MEMORY BUDGET ===
+DEFAULT_MEMORY_BUDGET_MB = 64
+# A chunk briefly exists several times over (parser buffers, the typed frame, transform
+# temporaries), so only a fraction of the budget is spent on the chunk itself.
+CHUNK_MEMORY_OVERHEAD = 4
+SAMPLE_ROWS = 1000
+
+
+# === HEADER HELPER FUNCTION ===
+def read_columns(input_path):
+    """Returns the column names of a CSV file without reading its rows."""
+    return pd.read_csv(input_path, nrows=0).columns.tolist()
+
+
+# === CHUNK SIZE ESTIMATION (INTERNAL) ===
+def _chunk_rows(input_path, columns, memory_budget_mb):
+    """Estimates how many rows of the projected columns fit in the memory budget."""
+    sample = pd.read_csv(input_path, usecols=list(columns), dtype=columns, nrows=SAMPLE_ROWS)
+    if sample.empty:
+        return SAMPLE_ROWS
+
+    bytes_per_row = max(1.0, sample.memory_usage(deep=True, index=False).sum() / len(sample))
+    return max(SAMPLE_ROWS, int(memory_budget_mb * 1024 * 1024 / (bytes_per_row * CHUNK_MEMORY_OVERHEAD)))
+
+
+# === PLOT DATA LOADING FUNCTION ===
+def load_plot_data(input_path, columns, transform=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Reads only the declared columns of a CSV, with their declared dtypes, in chunks sized
+    to the memory budget. Each chunk is passed through transform (filter, derive, drop
+    columns) before the reduced chunks are concatenated, so only the rows and columns a
+    plot actually needs are ever held in memory at once.
+
+    Args:
+        input_path (str): Path to the CSV file.
+        columns (dict): Column name -> dtype for every column the plot needs.
+        transform (callable, optional): Function DataFrame -> DataFrame applied per chunk.
+        memory_budget_mb (float): Approximate memory budget for one chunk and its transform.
+
+    Returns:
+        pd.DataFrame: The concatenated (transformed) chunks.
+    """
+    chunk_rows = _chunk_rows(input_path, columns, memory_budget_mb)
+    parts = []
+
+    for chunk in pd.read_csv(input_path, usecols=list(columns), dtype=columns, chunksize=chunk_rows):
+        parts.append(transform(chunk) if transform else chunk)
+
+    if not parts:
+        return pd.DataFrame(columns=list(columns))
+    if len(parts)==1:
+        return parts[0]
+    return pd.concat(parts, ignore_index=True)
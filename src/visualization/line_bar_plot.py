@@ -4,6 +4,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import numpy as np
+from src.database import is_database_path, query_monthly_rating_stats
+from src.monitoring import set_stage_rows, track_stage
+from src.sketches import ReviewSummaries, is_summary_path
+from src.utils import get_month_key, format_month_key
+from src.visualization.data_loader import DEFAULT_MEMORY_BUDGET_MB, load_plot_data, read_columns
+
+# Các cột đọc từ file CSV hợp nhất (file cũ: 'created_at' thay cho 'created_month')
+TIME_SERIES_COLUMNS = {'created_month': 'float64', 'rating': 'float64', 'comment_id': 'float64'}
 
 
 # =========================================================
@@ -15,14 +23,34 @@ def create_line_bar_plot(input_path, output_path):
     pass
 
 
+# =====================================================
+# HÀM GOM NHÓM MỘT KHỐI DỮ LIỆU THEO THÁNG (NỘI BỘ)
+# =====================================================
+def _aggregate_month_chunk(chunk):
+    """Tính tổng điểm và số lượng đánh giá theo khóa tháng cho một khối dữ liệu CSV."""
+    chunk = pd.DataFrame({
+        'created_month': get_month_key(chunk),
+        'rating': chunk['rating'],
+        'comment_id': chunk['comment_id'],
+    }).dropna(subset=['created_month', 'rating', 'comment_id'])
+
+    return chunk.groupby('created_month').agg(
+        rating_sum=('rating', 'sum'),
+        review_count=('comment_id', 'size')
+    ).reset_index()
+
+
 # ========================================================
 # 2. HÀM TẠO BIỂU ĐỒ XU HƯỚNG THEO THỜI GIAN (TIME SERIES)
 # ========================================================
-def create_line_bar_time_series_plot(input_path, output_path):
+@track_stage('line_bar_time_series_plot')
+def create_line_bar_time_series_plot(input_path, output_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
     Tạo biểu đồ Line-Bar kết hợp để phân tích Xu hướng Hài lòng theo Thời gian (Tháng-Năm).
     - Bar: Tổng số lượng đánh giá (Count)
     - Line: Điểm đánh giá trung bình (Avg Rating)
+    input_path có thể là file CSV hợp nhất, cơ sở dữ liệu nhúng hoặc file tóm tắt JSON (sketch);
+    file CSV được đọc theo từng khối trong giới hạn memory_budget_mb.
     """
     print(f"\n[Visualization] Bắt đầu tạo Biểu đồ Xu hướng Hài lòng theo Thời gian từ: {input_path}")
 
@@ -31,35 +59,57 @@ def create_line_bar_time_series_plot(input_path, output_path):
         return
 
     try:
-        # ==========================================
-        # 2.1. ĐỌC VÀ CHUẨN BỊ DỮ LIỆU ĐẦU VÀO
-        # ==========================================
-        df = pd.read_csv(input_path)
-
-        # Xử lý cột thời gian (Chuyển đổi sang datetime và loại bỏ lỗi)
-        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-
-        # Loại bỏ các hàng thiếu giá trị cần thiết
-        df.dropna(subset=['created_at', 'rating', 'comment_id'], inplace=True)
-
-        if df.empty:
-            print("⚠️ LỖI: DataFrame trống sau khi xử lý thời gian và rating.")
-            return
-
-        # ==================================================
-        # 2.2. GOM NHÓM VÀ TÍNH TOÁN THỐNG KÊ THEO THỜI GIAN
-        # ==================================================
-        # Nhóm dữ liệu theo Tháng-Năm (Month-Year)
-        df['Month_Year'] = df['created_at'].dt.to_period('M')
-
-        # Tính toán điểm đánh giá trung bình và tổng số lượng đánh giá
-        time_stats = df.groupby('Month_Year').agg(
-            avg_rating=('rating', 'mean'),
-            review_count=('comment_id', 'size')
-        ).reset_index()
-
-        # Chuyển Month_Year về định dạng string ('YYYY-MM') để dễ hiển thị
-        time_stats['Month_Year'] = time_stats['Month_Year'].dt.strftime('%Y-%m')
+        # Cơ sở dữ liệu nhúng: gom nhóm theo tháng được thực hiện ngay trong truy vấn
+        if is_database_path(input_path):
+            time_stats = query_monthly_rating_stats(input_path)
+
+            if time_stats.empty:
+                print("⚠️ LỖI: Không có đánh giá hợp lệ trong cơ sở dữ liệu.")
+                return
+
+            set_stage_rows(time_stats['review_count'].sum())
+        elif is_summary_path(input_path):
+            # Tóm tắt có thể gộp (sketch): số lượng và điểm trung bình theo tháng là chính xác
+            month_stats = ReviewSummaries.load(input_path).month_stats()
+            time_stats = month_stats[['Month_Year', 'mean', 'count']].rename(
+                columns={'mean': 'avg_rating', 'count': 'review_count'})
+
+            if time_stats.empty:
+                print("⚠️ LỖI: File tóm tắt không có dữ liệu theo tháng.")
+                return
+
+            set_stage_rows(time_stats['review_count'].sum())
+        else:
+            # ==========================================
+            # 2.1. ĐỌC VÀ CHUẨN BỊ DỮ LIỆU ĐẦU VÀO
+            # ==========================================
+            # Chỉ đọc các cột cần thiết theo từng khối (chunk) trong giới hạn bộ nhớ;
+            # file cũ chưa có 'created_month' thì đọc 'created_at' (chuỗi ngày) để tính khóa tháng
+            columns = dict(TIME_SERIES_COLUMNS)
+            if 'created_month' not in read_columns(input_path):
+                del columns['created_month']
+                columns['created_at'] = 'str'
+            partial_stats = load_plot_data(input_path, columns, _aggregate_month_chunk, memory_budget_mb)
+
+            if partial_stats.empty:
+                print("⚠️ LỖI: DataFrame trống sau khi xử lý thời gian và rating.")
+                return
+
+            # ==================================================
+            # 2.2. GOM NHÓM VÀ TÍNH TOÁN THỐNG KÊ THEO THỜI GIAN
+            # ==================================================
+            # Cộng dồn tổng điểm và số lượng đánh giá của các khối theo khóa Tháng-Năm
+            # (YYYYMM, thứ tự số nguyên = thứ tự thời gian) rồi tính điểm trung bình
+            totals = partial_stats.groupby('created_month')[['rating_sum', 'review_count']].sum()
+            time_stats = pd.DataFrame({
+                'avg_rating': totals['rating_sum'] / totals['review_count'],
+                'review_count': totals['review_count'],
+            }).reset_index()
+
+            set_stage_rows(time_stats['review_count'].sum())
+
+            # Chuyển khóa tháng về định dạng string ('YYYY-MM') để dễ hiển thị
+            time_stats.insert(0, 'Month_Year', format_month_key(time_stats.pop('created_month')))
 
         # ===============================================
         # 2.3. CẤU HÌNH VÀ VẼ BIỂU ĐỒ LINE BAR KẾT HỢP
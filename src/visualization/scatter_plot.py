@@ -8,19 +8,40 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import numpy as np
+from src.database import is_database_path, query_review_length_vs_rating
+from src.monitoring import set_stage_rows, track_stage
+from src.visualization.data_loader import DEFAULT_MEMORY_BUDGET_MB, load_plot_data
+
+# Các cột đọc từ file CSV hợp nhất
+SCATTER_PLOT_COLUMNS = {'content': 'str', 'rating': 'float64'}
+
+
+# =====================================================
+# HÀM TÍNH ĐỘ DÀI BÌNH LUẬN CHO MỘT KHỐI DỮ LIỆU (NỘI BỘ)
+# =====================================================
+def _review_length_chunk(chunk):
+    """
+    Tính Độ dài Bình luận (số ký tự, nội dung thiếu = 0) và chỉ giữ lại các bình luận
+    có nội dung và rating hợp lệ (1-5).
+    """
+    review_length = chunk['content'].str.len().fillna(0).astype(int)
+    mask = (review_length > 0) & (chunk['rating'] >= 1) & (chunk['rating'] <= 5)
+    return pd.DataFrame({'review_length': review_length[mask], 'rating': chunk['rating'][mask].astype(int)})
 
 
 # =========================================================================
 # 2. HÀM TẠO BIỂU ĐỒ PHÂN TÁN: ĐỘ DÀI BÌNH LUẬN VS. ĐIỂM ĐÁNH GIÁ (RATING)
 # =========================================================================
-def create_scatter_plot(input_path, output_path):
+@track_stage('scatter_plot')
+def create_scatter_plot(input_path, output_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
     Tạo biểu đồ Phân tán (Scatter Plot) để phân tích mối quan hệ giữa Độ dài Bình luận
     (số ký tự) và Điểm đánh giá (Rating Score).
 
     Args:
-        input_path (str): Đường dẫn đến file CSV chứa dữ liệu đã hợp nhất.
+        input_path (str): Đường dẫn đến file CSV chứa dữ liệu đã hợp nhất (hoặc file cơ sở dữ liệu .sqlite).
         output_path (str): Đường dẫn để lưu ảnh Biểu đồ Phân tán.
+        memory_budget_mb (float): Giới hạn bộ nhớ (MB) cho mỗi khối khi đọc file CSV.
     """
     print(f"\n[Visualization] Bắt đầu tạo Biểu đồ Phân tán (Độ dài Bình luận vs. Rating) từ: {input_path}")
 
@@ -29,23 +50,26 @@ def create_scatter_plot(input_path, output_path):
         return
 
     try:
-        # ==========================================
-        # 2.1. ĐỌC VÀ CHUẨN BỊ DỮ LIỆU
-        # ==========================================
-        df = pd.read_csv(input_path)
-
-        # Đảm bảo cột nội dung (content) tồn tại và điền giá trị thiếu (NaN)
-        df['content'] = df['content'].fillna('')
-
-        # Tính toán Độ dài Bình luận (số ký tự)
-        df['review_length'] = df['content'].apply(len)
-
-        # Lọc dữ liệu: chỉ giữ lại các bình luận có nội dung và rating hợp lệ (1-5)
-        df_filtered = df[(df['review_length'] > 0) & (df['rating'] >= 1) & (df['rating'] <= 5)].copy()
-
-        if df_filtered.empty:
-            print("⚠️ CẢNH BÁO: Không có bình luận có nội dung để phân tích.")
-            return
+        # Cơ sở dữ liệu nhúng: tính độ dài và lọc dữ liệu ngay trong truy vấn
+        if is_database_path(input_path):
+            df_filtered = query_review_length_vs_rating(input_path)
+
+            if df_filtered.empty:
+                print("⚠️ CẢNH BÁO: Không có bình luận có nội dung để phân tích.")
+                return
+        else:
+            # ==========================================
+            # 2.1. ĐỌC VÀ CHUẨN BỊ DỮ LIỆU
+            # ==========================================
+            # Chỉ đọc 'content' và 'rating' theo từng khối (chunk) trong giới hạn bộ nhớ;
+            # mỗi khối chỉ giữ lại độ dài bình luận thay cho toàn bộ nội dung
+            df_filtered = load_plot_data(input_path, SCATTER_PLOT_COLUMNS, _review_length_chunk, memory_budget_mb)
+
+            if df_filtered.empty:
+                print("⚠️ CẢNH BÁO: Không có bình luận có nội dung để phân tích.")
+                return
+
+        set_stage_rows(len(df_filtered))
 
         # =========================================================
         # 2.2. CẤU HÌNH VÀ VẼ SCATTER PLOT VỚI ĐƯỜNG HỒI QUY
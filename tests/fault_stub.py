@@ -0,0 +1,165 @@
+# Data-science-project\tests\fault_stub.py
+
+# === IMPORTS ===
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# === FAULT-INJECTING TIKI API STUB ===
+class FaultStub:
+    """
+    A local stand-in for the Tiki API endpoints used by the crawlers (/products,
+    /products/<id> and /reviews) that injects faults on demand.
+
+    Scripted faults are served to the next requests in order: fail_next() answers with an
+    error status (optionally with Retry-After), garbage_next() answers 200 with a non-JSON
+    body (a captcha page or truncated response) and delay_next() stalls before answering
+    normally. With error_rate/slow_rate, faults are also injected at random, which is how
+    the crawlers can be run against it end to end (TIKI_API_BASE_URL=<stub.url>).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, error_rate=0.0, slow_rate=0.0, slow_seconds=1.5,
+                 comments_per_product=13, page_size=10):
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.comments_per_product = comments_per_product
+        self.page_size = page_size
+        self.request_count = 0
+        self._faults = deque()
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                try:
+                    stub._handle(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on this request (timeout or a hedged duplicate won)
+                    pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    # --- FAULT SCRIPTING ---
+    def fail_next(self, status=503, times=1, retry_after=None):
+        """Answers the next `times` requests with an error status."""
+        with self._lock:
+            self._faults.extend([('status', status, retry_after)] * times)
+        return self
+
+    def garbage_next(self, body=b'<html>captcha</html>', times=1):
+        """Answers the next `times` requests with status 200 and a body that is not JSON."""
+        with self._lock:
+            self._faults.extend([('body', body, None)] * times)
+        return self
+
+    def delay_next(self, seconds, times=1):
+        """Stalls the next `times` requests for `seconds` before answering normally."""
+        with self._lock:
+            self._faults.extend([('delay', seconds, None)] * times)
+        return self
+
+    def _next_fault(self):
+        with self._lock:
+            self.request_count += 1
+            if self._faults:
+                return self._faults.popleft()
+
+        roll = random.random()
+        if roll < self.error_rate:
+            return ('status', random.choice((429, 503)), 0.05)
+        if roll < self.error_rate + self.slow_rate:
+            return ('delay', self.slow_seconds, None)
+        return None
+
+    # --- RESPONSES ---
+    def _body(self, url):
+        path, query = url.path.rstrip('/'), parse_qs(url.query)
+
+        if path.endswith('/products'):
+            page = int(query.get('page', ['1'])[0])
+            return {'data': [{'id': page * 100 + i} for i in range(5)] if page <= 3 else []}
+
+        if '/products/' in path:
+            pid = int(path.rsplit('/', 1)[1])
+            return {'id': pid, 'meta_title': f'Product {pid}', 'review_count': self.comments_per_product,
+                    'brand': {'id': pid % 3, 'name': f'Brand {pid % 3}'}}
+
+        pid = int(query['product_id'][0])
+        page = int(query.get('page', ['1'])[0])
+        first = (page - 1) * self.page_size
+        last = min(first + self.page_size, self.comments_per_product)
+        return {'data': [{'id': pid * 1000 + i, 'rating': 1 + i % 5, 'content': f'review {i}',
+                          'created_at': 1_700_000_000 + i * 86_400, 'customer_id': i}
+                         for i in range(first, last)]}
+
+    def _handle(self, handler):
+        fault = self._next_fault()
+        if fault is not None and fault[0]=='status':
+            _, status, retry_after = fault
+            handler.send_response(status)
+            if retry_after is not None:
+                handler.send_header('Retry-After', str(retry_after))
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        if fault is not None and fault[0]=='delay':
+            time.sleep(fault[1])
+
+        if fault is not None and fault[0]=='body':
+            body, content_type = fault[1], 'text/html'
+        else:
+            body, content_type = json.dumps(self._body(urlparse(handler.path))).encode('utf-8'), 'application/json'
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    # --- LIFECYCLE ---
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+# === COMMAND-LINE ENTRY POINT ===
+if __name__=="__main__":
+    # Run the crawlers against it with: TIKI_API_BASE_URL=http://127.0.0.1:8765 python main.py
+    parser = argparse.ArgumentParser(description='Serve a fault-injecting stub of the Tiki API.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.15, help='Share of requests answered with 429/503.')
+    parser.add_argument('--slow-rate', type=float, default=0.05, help='Share of requests stalled for --slow-seconds.')
+    parser.add_argument('--slow-seconds', type=float, default=1.5)
+    args = parser.parse_args()
+
+    stub = FaultStub(port=args.port, error_rate=args.error_rate, slow_rate=args.slow_rate, slow_seconds=args.slow_seconds)
+    print(f"Fault-injecting Tiki API stub listening on {stub.url}")
+    stub.server.serve_forever()
@@ -0,0 +1,45 @@
+# Data-science-project\tests\test_data_fetcher.py
+
+# === IMPORTS ===
+import pytest
+from src.ingestion import data_fetcher
+from src.ingestion.resilience import CircuitBreaker, ResilientClient
+from src.monitoring import start_run
+from tests.fault_stub import FaultStub
+
+
+# === FIXTURES ===
+@pytest.fixture
+def stub(monkeypatch):
+    start_run('test_data_fetcher')
+    with FaultStub(comments_per_product=13) as server:
+        monkeypatch.setattr(data_fetcher, 'API_BASE_URL', server.url)
+        monkeypatch.setattr(data_fetcher, 'CLIENT', ResilientClient(
+            timeout=(1, 2), max_retries=2, backoff_base=0.001, backoff_max=0.01,
+            breaker=CircuitBreaker(failure_threshold=100)))
+        # No per-request throttling against the local stub
+        monkeypatch.setattr(data_fetcher.random, 'uniform', lambda low, high: 0)
+        yield server
+
+
+# === INVALID RESPONSE BODIES ===
+@pytest.mark.parametrize('body', [b'<html>captcha</html>', b'{"data": [{"id": 1', b'[1, 2]'])
+def test_invalid_json_counts_as_a_failed_fetch(stub, body):
+    stub.garbage_next(body, times=2)
+
+    assert data_fetcher._fetch_comment_records(1, 1) is None
+    assert data_fetcher._fetch_product_record(1) is None
+    assert len(data_fetcher._fetch_comment_records(1, 1))==10
+
+
+def test_comment_crawl_continues_past_an_invalid_page(stub, tmp_path):
+    ids_path = tmp_path / 'ids.csv'
+    ids_path.write_text('id\n1\n2\n')
+    stub.garbage_next()
+
+    df_comment = data_fetcher.fetch_product_comments(str(ids_path), max_comment_pages=5,
+                                                     output_path=str(tmp_path / 'comments.csv'))
+
+    # Product 1 stops at its invalid first page; product 2 is still crawled in full
+    assert sorted(df_comment['product_id'].unique())==[2]
+    assert len(df_comment)==13
@@ -0,0 +1,25 @@
+# Data-science-project\tests\test_database.py
+
+# === IMPORTS ===
+import sqlite3
+import pandas as pd
+from src.database import upsert_products, upsert_reviews
+
+
+# === RAW INGEST UPSERTS ===
+def test_raw_upsert_keeps_values_stored_by_cleaning(tmp_path):
+    db_path = str(tmp_path / 'store.sqlite')
+    upsert_products(db_path, pd.DataFrame({'id': [1, 2], 'price': [0.0, 0.0], 'brand_id': ['unknown', 'unknown']}))
+    upsert_reviews(db_path, pd.DataFrame({'id': [10, 11], 'product_id': [1, 1], 'content': ['', ''], 'rating': [5, 4]}))
+
+    # A re-crawl brings missing values for cleaned columns and a changed rating
+    upsert_products(db_path, pd.DataFrame({'id': [1, 3], 'price': [None, 9.5], 'brand_id': [None, '7']}), raw=True)
+    upsert_reviews(db_path, pd.DataFrame({'id': [10, 12], 'product_id': [1, 1], 'content': [None, None],
+                                          'rating': [3, 2]}), raw=True)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT id, price, brand_id FROM products ORDER BY id').fetchall()==[
+        ('1', 0.0, 'unknown'), ('2', 0.0, 'unknown'), ('3', 9.5, '7')]
+    assert conn.execute('SELECT comment_id, content, rating FROM reviews ORDER BY comment_id').fetchall()==[
+        (10, '', 3), (11, '', 4), (12, None, 2)]
+    conn.close()
@@ -0,0 +1,117 @@
+# Data-science-project\tests\test_dedup.py
+
+# === IMPORTS ===
+import pandas as pd
+from src.ingestion.dedup import open_review_index
+
+COLUMNS = ['id', 'product_id', 'customer_id', 'content']
+
+
+# === HELPERS ===
+def reviews(ids, product_id=1):
+    return [{'id': i, 'product_id': product_id, 'customer_id': i, 'content': f'review {i}'} for i in ids]
+
+
+def write_batch(dedup, output_path, records, commit=True):
+    """Stores a batch the way the crawlers do: filter, append to the CSV, then commit."""
+    new_records = dedup.filter_new(records, commit=False)
+    pd.DataFrame(new_records, columns=COLUMNS).to_csv(output_path, mode='a', header=False, index=False)
+    if commit:
+        dedup.commit()
+    return new_records
+
+
+def start_output(output_path):
+    pd.DataFrame(columns=COLUMNS).to_csv(output_path, index=False)
+
+
+# === INTERRUPTED WRITES ===
+def test_rows_appended_after_the_last_commit_are_recovered_from_the_tail(tmp_path):
+    index_path, output_path = str(tmp_path / 'index.sqlite'), str(tmp_path / 'reviews.csv')
+
+    dedup, append = open_review_index(index_path, output_path)
+    assert not append
+    start_output(output_path)
+    write_batch(dedup, output_path, reviews(range(10)))
+    committed = dedup.committed_size()
+    # Crash after the page reached the file but before the index committed it
+    write_batch(dedup, output_path, reviews(range(10, 20)), commit=False)
+    dedup.abort()
+
+    dedup, append = open_review_index(index_path, output_path)
+    assert append
+    assert dedup.committed_size() > committed
+
+    # The re-fetched page is recognized, so the file never holds a review twice
+    assert write_batch(dedup, output_path, reviews(range(15, 25)))==reviews(range(20, 25))
+    dedup.close()
+    df = pd.read_csv(output_path)
+    assert df['id'].tolist()==list(range(25))
+
+
+def test_replaced_output_file_rebuilds_the_index(tmp_path):
+    index_path, output_path = str(tmp_path / 'index.sqlite'), str(tmp_path / 'reviews.csv')
+
+    dedup, _ = open_review_index(index_path, output_path)
+    start_output(output_path)
+    write_batch(dedup, output_path, reviews(range(20)))
+    dedup.close()
+
+    # A smaller file replaced the one the index described
+    start_output(output_path)
+    pd.DataFrame(reviews(range(5)), columns=COLUMNS).to_csv(output_path, mode='a', header=False, index=False)
+
+    dedup, append = open_review_index(index_path, output_path)
+    assert append
+    assert write_batch(dedup, output_path, reviews(range(3, 8)))==reviews(range(5, 8))
+    dedup.close()
+
+
+def test_abort_forgets_reviews_recorded_since_the_last_commit(tmp_path):
+    index_path, output_path = str(tmp_path / 'index.sqlite'), str(tmp_path / 'reviews.csv')
+
+    dedup, _ = open_review_index(index_path, output_path)
+    start_output(output_path)
+    write_batch(dedup, output_path, reviews(range(5)))
+    # A batch filtered but never written
+    dedup.filter_new(reviews(range(5, 10)), commit=False)
+    dedup.abort()
+
+    dedup, _ = open_review_index(index_path, output_path)
+    assert dedup.filter_new(reviews(range(10)), commit=False)==reviews(range(5, 10))
+    dedup.abort()
+
+
+# === PERSISTENCE ACROSS RUNS ===
+def test_index_survives_across_runs(tmp_path):
+    index_path, output_path = str(tmp_path / 'index.sqlite'), str(tmp_path / 'reviews.csv')
+
+    dedup, _ = open_review_index(index_path, output_path, check_content=True)
+    start_output(output_path)
+    write_batch(dedup, output_path, reviews(range(10)))
+    dedup.close()
+
+    # A later run: known IDs and a re-posted review under a new ID are both rejected
+    dedup, append = open_review_index(index_path, output_path, check_content=True)
+    reposted = {'id': 100, 'product_id': 1, 'customer_id': 3, 'content': '  REVIEW 3 '}
+    assert append
+    assert write_batch(dedup, output_path, reviews(range(8, 12)) + [reposted])==reviews(range(10, 12))
+    assert (dedup.rejected_ids, dedup.rejected_content)==(2, 1)
+    dedup.close()
+
+    assert pd.read_csv(output_path)['id'].tolist()==list(range(12))
+
+
+def test_deleted_output_resets_the_index(tmp_path):
+    index_path, output_path = str(tmp_path / 'index.sqlite'), str(tmp_path / 'reviews.csv')
+
+    dedup, _ = open_review_index(index_path, output_path)
+    start_output(output_path)
+    write_batch(dedup, output_path, reviews(range(10)))
+    dedup.close()
+
+    (tmp_path / 'reviews.csv').unlink()
+    dedup, append = open_review_index(index_path, output_path)
+    assert not append
+    assert dedup.filter_new(reviews(range(10)))==reviews(range(10))
+    dedup.close()
@@ -0,0 +1,71 @@
+# Data-science-project\tests\test_distributed_crawl.py
+
+# === IMPORTS ===
+import pandas as pd
+import pytest
+from src.ingestion import data_fetcher
+from src.ingestion.distributed_crawl import run_distributed_crawl
+from src.ingestion.resilience import CircuitBreaker, ResilientClient
+from src.ingestion.work_queue import WorkQueue
+from src.monitoring import start_run
+from tests.fault_stub import FaultStub
+
+
+# === FIXTURES ===
+@pytest.fixture
+def stub(monkeypatch):
+    start_run('test_distributed_crawl')
+    with FaultStub(comments_per_product=13) as server:
+        # Worker processes are forked, so they inherit the patched module globals
+        monkeypatch.setattr(data_fetcher, 'API_BASE_URL', server.url)
+        monkeypatch.setattr(data_fetcher, 'CLIENT', ResilientClient(
+            timeout=(1, 2), max_retries=2, backoff_base=0.001, backoff_max=0.01,
+            breaker=CircuitBreaker(failure_threshold=100)))
+        yield server
+
+
+def crawl(tmp_path, **kwargs):
+    return run_distributed_crawl(
+        input_path=str(tmp_path / 'ids.csv'), db_path=str(tmp_path / 'queue.sqlite'), num_workers=2,
+        max_comment_pages=5, product_output_path=str(tmp_path / 'products.csv'),
+        comment_output_path=str(tmp_path / 'comments.csv'), dedup_index_path=str(tmp_path / 'index.sqlite'),
+        **kwargs)
+
+
+# === RE-RUNNING A FINISHED CRAWL ===
+def test_finished_crawl_is_retired_and_a_rerun_fetches_again(stub, tmp_path):
+    (tmp_path / 'ids.csv').write_text('id\n1\n2\n')
+
+    df_first = crawl(tmp_path)
+    assert len(df_first)==2 * 13
+    assert WorkQueue(str(tmp_path / 'queue.sqlite')).counts()=={}
+
+    requests_before = stub.request_count
+    df_second = crawl(tmp_path)
+
+    # Every product and page is fetched again; the reviews are already in the file
+    assert stub.request_count - requests_before==2 + 2 * 2
+    assert df_second.empty
+    assert len(pd.read_csv(tmp_path / 'products.csv'))==2
+    assert len(pd.read_csv(tmp_path / 'comments.csv'))==2 * 13
+
+
+# === COMMENT PAGES PLANNED FROM FRESHLY FETCHED PRODUCTS ===
+def test_comment_pages_follow_from_the_fetched_review_count(stub, tmp_path):
+    (tmp_path / 'ids.csv').write_text('id\n1\n2\n3\n')
+    # A stale product file from an earlier crawl is not consulted
+    (tmp_path / 'products.csv').write_text('id,review_count\n1,0\n2,0\n3,0\n')
+
+    df_comment = crawl(tmp_path)
+
+    assert len(df_comment)==3 * 13
+    assert stub.request_count==3 + 3 * 2
+
+
+def test_request_budget_caps_the_queued_comment_pages(stub, tmp_path):
+    (tmp_path / 'ids.csv').write_text('id\n1\n2\n3\n')
+
+    df_comment = crawl(tmp_path, request_budget=3)
+
+    assert stub.request_count==3 + 3
+    assert len(df_comment)==13 + 10
@@ -0,0 +1,38 @@
+# Data-science-project\tests\test_monitoring.py
+
+# === IMPORTS ===
+import os
+from src import monitoring
+from src.monitoring import RunMetrics
+
+
+# === MEMORY SAMPLING ===
+def test_current_rss_falls_back_to_peak_rss_without_proc(monkeypatch, tmp_path):
+    monkeypatch.setattr(monitoring, 'psutil', None)
+    monkeypatch.setattr(monitoring, '_STATM_PATH', str(tmp_path / 'missing'))
+
+    assert monitoring._current_rss_mb()==monitoring._peak_rss_mb()
+
+
+def test_current_rss_is_none_without_any_source(monkeypatch, tmp_path):
+    monkeypatch.setattr(monitoring, 'psutil', None)
+    monkeypatch.setattr(monitoring, 'resource', None)
+    monkeypatch.setattr(monitoring, '_STATM_PATH', str(tmp_path / 'missing'))
+
+    assert monitoring._current_rss_mb() is None
+    with RunMetrics('no_rss').stage('load') as record:
+        pass
+    assert record['status']=='ok'
+
+
+# === PROFILE DUMPS ===
+def test_repeated_profiled_stages_get_distinct_dumps(tmp_path):
+    run = RunMetrics('profiled', profile_dir=str(tmp_path))
+
+    for _ in range(2):
+        with run.stage('load'):
+            sum(range(1000))
+
+    paths = [stage['profile_path'] for stage in run.stages]
+    assert len(set(paths))==2
+    assert all(os.path.exists(path) for path in paths)
@@ -0,0 +1,191 @@
+# Data-science-project\tests\test_resilience.py
+
+# === IMPORTS ===
+import time
+import pytest
+import requests
+from src.ingestion.resilience import CircuitBreaker, LatencyTracker, ResilientClient
+from src.monitoring import get_run, start_run
+from tests.fault_stub import FaultStub
+
+
+# === FIXTURES ===
+@pytest.fixture
+def stub():
+    with FaultStub() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def metrics_run():
+    return start_run('test_resilience')
+
+
+def fast_client(**kwargs):
+    """A client with millisecond backoff so retry tests run quickly."""
+    options = dict(timeout=(1, 2), max_retries=3, backoff_base=0.001, backoff_max=0.01,
+                   breaker=CircuitBreaker(failure_threshold=100))
+    options.update(kwargs)
+    return ResilientClient(**options)
+
+
+def reviews_url(stub):
+    return f'{stub.url}/reviews?product_id=1&page=1'
+
+
+# === RETRIES AND BACKOFF ===
+def test_retries_retryable_statuses_until_success(stub):
+    stub.fail_next(503, times=2).fail_next(429, retry_after=0)
+
+    response = fast_client().get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert stub.request_count==4
+    stats = get_run().requests['reviews']
+    assert stats['retries']==3
+    assert stats['status_codes']=={'503': 2, '429': 1, '200': 1}
+
+
+def test_returns_last_error_response_when_retries_are_exhausted(stub):
+    stub.fail_next(503, times=10)
+
+    response = fast_client(max_retries=2).get('reviews', reviews_url(stub))
+
+    assert response.status_code==503
+    assert stub.request_count==3
+
+
+def test_non_retryable_status_is_not_retried(stub):
+    stub.fail_next(404)
+
+    response = fast_client().get('reviews', reviews_url(stub))
+
+    assert response.status_code==404
+    assert stub.request_count==1
+
+
+def test_honors_retry_after(stub):
+    stub.fail_next(429, retry_after=0.3)
+
+    start = time.perf_counter()
+    response = fast_client(backoff_max=1.0).get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert time.perf_counter() - start >= 0.3
+
+
+def test_retries_timeouts(stub):
+    stub.delay_next(0.5)
+
+    response = fast_client(timeout=(1, 0.1)).get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert stub.request_count==2
+    assert get_run().requests['reviews']['errors']==1
+
+
+def test_raises_last_error_when_every_attempt_times_out(stub):
+    stub.delay_next(0.3, times=3)
+
+    with pytest.raises(requests.Timeout):
+        fast_client(timeout=(1, 0.05), max_retries=2).get('reviews', reviews_url(stub))
+
+
+def test_backoff_is_bounded_full_jitter():
+    client = ResilientClient(backoff_base=0.5, backoff_max=4.0)
+
+    for attempt in range(8):
+        delay = client._backoff(attempt)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+    # Retry-After is a floor, itself capped at backoff_max
+    assert client._backoff(0, retry_after=2.0) >= 2.0
+    assert client._backoff(0, retry_after=60.0) <= 4.0
+
+
+# === CIRCUIT BREAKER ===
+def test_breaker_opens_after_repeated_failures_and_closes_after_success(stub):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.3)
+    client = fast_client(max_retries=0, breaker=breaker)
+    stub.fail_next(503, times=2)
+
+    client.get('reviews', reviews_url(stub))
+    assert not breaker.is_open
+    client.get('reviews', reviews_url(stub))
+    assert breaker.is_open
+
+    # The next request waits out the cooldown, succeeds and closes the circuit
+    start = time.perf_counter()
+    response = client.get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert time.perf_counter() - start >= 0.25
+    assert not breaker.is_open
+    assert breaker._failures==0
+    assert breaker._cooldown==breaker.base_cooldown
+
+
+def test_breaker_reopens_with_doubled_cooldown_when_trial_fails():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1, max_cooldown=0.3)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    time.sleep(0.12)
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker._cooldown==pytest.approx(0.3)
+
+
+# === HEDGED REQUESTS ===
+def test_hedged_request_fires_when_primary_is_slower_than_p95(stub):
+    client = fast_client(hedge=True)
+    client.latencies = LatencyTracker(min_samples=5)
+
+    # Establish a fast p95 for the endpoint
+    for _ in range(5):
+        client.get('reviews', reviews_url(stub))
+    assert client.latencies.p95('reviews') < 0.5
+
+    stub.delay_next(1.5)
+    before = stub.request_count
+    start = time.perf_counter()
+    response = client.get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert time.perf_counter() - start < 1.0
+    assert stub.request_count - before==2
+
+
+def test_no_hedge_without_enough_latency_samples(stub):
+    client = fast_client(hedge=True)
+
+    stub.delay_next(0.3)
+    response = client.get('reviews', reviews_url(stub))
+
+    assert response.status_code==200
+    assert stub.request_count==1
+
+
+# === END TO END: CRAWLING THROUGH INJECTED FAULTS ===
+def test_comment_crawl_through_random_faults_loses_no_reviews(tmp_path, monkeypatch):
+    from src.ingestion import data_fetcher
+
+    with FaultStub(error_rate=0.2, comments_per_product=13) as stub:
+        # Random faults on top of two guaranteed ones
+        stub.fail_next(503).fail_next(429, retry_after=0)
+        monkeypatch.setattr(data_fetcher, 'API_BASE_URL', stub.url)
+        monkeypatch.setattr(data_fetcher, 'CLIENT', fast_client(max_retries=6))
+        # No per-request throttling against the local stub
+        monkeypatch.setattr(data_fetcher.random, 'uniform', lambda low, high: 0)
+
+        ids_path = tmp_path / 'ids.csv'
+        ids_path.write_text('id\n1\n2\n3\n')
+        df_comment = data_fetcher.fetch_product_comments(str(ids_path), max_comment_pages=5,
+                                                         output_path=str(tmp_path / 'comments.csv'))
+
+    assert len(df_comment)==3 * 13
+    assert df_comment['id'].is_unique
+    assert get_run().requests['reviews']['retries'] >= 2
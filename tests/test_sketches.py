@@ -0,0 +1,64 @@
+# Data-science-project\tests\test_sketches.py
+
+# === IMPORTS ===
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.sketches import ReviewSummaries, update_review_summaries
+
+STAT_COLUMNS = ['count', 'mean', 'std', 'min', 'q1', 'median', 'q3', 'max', 'distinct_customers']
+
+
+# === HELPERS ===
+def merged_reviews(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'comment_id': np.arange(n),
+        'rating': rng.integers(1, 6, n),
+        'brand_name': rng.choice(['Alpha', 'Beta', 'Gamma'], n),
+        'created_month': rng.choice([202401, 202402, 202403], n),
+        'customer_id': rng.integers(0, 50, n),
+    })
+
+
+def assert_same_stats(actual, expected):
+    for stats in (lambda s: s.brand_stats().sort_values('brand_name', ignore_index=True), ReviewSummaries.month_stats):
+        pd.testing.assert_frame_equal(stats(actual), stats(expected), check_exact=False)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {'input_path': str(tmp_path / 'merged.csv'), 'summary_path': str(tmp_path / 'summary.json'),
+            'index_path': str(tmp_path / 'index.sqlite')}
+
+
+# === INCREMENTAL BATCHES ===
+def test_batches_merged_across_runs_match_a_full_rebuild(paths, tmp_path):
+    df = merged_reviews(300)
+
+    # Each run sees the merged file grow; rows of earlier runs are already summarized
+    for end in (100, 220, 300):
+        df.iloc[:end].to_csv(paths['input_path'], index=False)
+        update_review_summaries(**paths, batch_dir=str(tmp_path / 'batches'), chunksize=64)
+
+    summary = ReviewSummaries.load(paths['summary_path'])
+    assert summary.reviews==300
+    assert len(os.listdir(tmp_path / 'batches'))==3
+    # Under KLL_K values per group, so quantiles are exact as well
+    assert_same_stats(summary, ReviewSummaries().update(df))
+
+    assert update_review_summaries(**paths) is None
+
+
+def test_lost_index_rebuilds_instead_of_double_counting(paths):
+    df = merged_reviews(150)
+    df.to_csv(paths['input_path'], index=False)
+    update_review_summaries(**paths)
+
+    os.remove(paths['index_path'])
+    update_review_summaries(**paths)
+
+    summary = ReviewSummaries.load(paths['summary_path'])
+    assert summary.reviews==150
+    assert_same_stats(summary, ReviewSummaries().update(df))
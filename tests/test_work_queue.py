@@ -0,0 +1,67 @@
+# Data-science-project\tests\test_work_queue.py
+
+# === IMPORTS ===
+import time
+import pytest
+from src.ingestion.work_queue import WorkQueue
+
+
+# === FIXTURES ===
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / 'queue.sqlite'), lease_seconds=0.2, max_attempts=3)
+
+
+def task(task_id, priority=0):
+    return task_id, 'comments', {'product_id': int(task_id.split(':')[1]), 'page': 1}, priority
+
+
+# === LEASES ===
+def test_leased_task_is_not_handed_out_twice_until_its_lease_expires(queue):
+    queue.enqueue([task('comments:1')])
+
+    first = queue.lease('worker-a')
+    assert first['attempt']==1
+    assert queue.lease('worker-b') is None
+
+    time.sleep(0.25)
+    second = queue.lease('worker-b')
+    assert second['task_id']=='comments:1'
+    assert second['attempt']==2
+
+
+def test_complete_after_a_lost_lease_writes_nothing(queue):
+    queue.enqueue([task('comments:1')])
+    slow = queue.lease('worker-a')
+    time.sleep(0.25)
+    fast = queue.lease('worker-b')
+
+    assert queue.complete(fast, [{'id': 1}], [task('comments:2')])
+    # The slow worker finishes later: its results and follow-ups are discarded
+    assert not queue.complete(slow, [{'id': 1}, {'id': 99}], [task('comments:3')])
+    queue.fail(slow, 'late failure')
+
+    assert list(queue.iter_results('comments'))==[{'id': 1}]
+    assert queue.counts()=={'done': 1, 'pending': 1}
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_task(queue):
+    queue.enqueue([task('comments:1')])
+
+    for _ in range(3):
+        assert queue.lease('worker-a') is not None
+        time.sleep(0.25)
+
+    assert queue.lease('worker-a') is None
+    assert queue.counts()=={'failed': 1}
+    assert not queue.has_open_tasks()
+
+
+# === PRIORITIES AND BUDGETS ===
+def test_leases_by_priority_and_caps_follow_ups_by_budget(queue):
+    queue.enqueue([task('comments:1', priority=1), task('comments:2', priority=5)])
+
+    leased = queue.lease('worker-a')
+    assert leased['task_id']=='comments:2'
+    assert queue.complete(leased, [], [task('comments:3'), task('comments:4')], follow_up_budget=3)
+    assert queue.counts()=={'done': 1, 'pending': 2}